@@ -1,6 +1,6 @@
 """Tuya Agent Tools - Agent interface for the Tuya IoT ecosystem."""
 
-from tuya_agent.client import TuyaClient
+from tuya_agent.client import TuyaClient, run
 from tuya_agent.collector import CollectorConfig, LogCollector
 from tuya_agent.config import TuyaConfig
 from tuya_agent.server import create_app
@@ -15,4 +15,5 @@ __all__ = [
     "TuyaClient",
     "TuyaConfig",
     "create_app",
+    "run",
 ]
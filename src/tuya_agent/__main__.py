@@ -13,11 +13,12 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import signal
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-from tuya_agent.client import TuyaClient
+from tuya_agent.client import TuyaClient, run
 from tuya_agent.collector import CollectorConfig, LogCollector
 from tuya_agent.storage import LogStorage
 from tuya_agent.watcher import EventWatcher
@@ -105,9 +106,9 @@ def main() -> None:
     )
 
     if args.command == "collect":
-        asyncio.run(_run_collect(args))
+        run(_run_collect(args))
     elif args.command == "watch":
-        asyncio.run(_run_watch(args))
+        run(_run_watch(args))
     elif args.command == "serve":
         _run_serve(args)
     elif args.command == "status":
@@ -125,7 +126,7 @@ async def _run_collect(args: argparse.Namespace) -> None:
         async with TuyaClient() as client:
             collector = LogCollector(client, storage, config)
             if args.daemon:
-                await collector.run_daemon()
+                await _run_daemon(collector)
             else:
                 result = await collector.collect_all()
                 print(
@@ -138,6 +139,43 @@ async def _run_collect(args: argparse.Namespace) -> None:
                         print(f"  Error: {err}")
 
 
+async def _run_daemon(collector: LogCollector) -> None:
+    """Run *collector* on its schedule until interrupted.
+
+    The first Ctrl+C / SIGTERM lets the current run finish, then exits
+    cleanly; a second one cancels the run in progress.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(collector.run_daemon())
+    signals = 0
+
+    def _on_signal() -> None:
+        nonlocal signals
+        signals += 1
+        if signals == 1:
+            print("\nStopping after the current run — press Ctrl+C again to abort")
+            collector.stop()
+        else:
+            task.cancel()
+
+    installed: list[signal.Signals] = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, _on_signal)
+        except NotImplementedError:  # Windows event loops
+            continue
+        installed.append(sig)
+    try:
+        await task
+    except asyncio.CancelledError:
+        if signals < 2:
+            raise
+        print("Collection aborted")
+    finally:
+        for sig in installed:
+            loop.remove_signal_handler(sig)
+
+
 async def _run_watch(args: argparse.Namespace) -> None:
     import websockets
 
@@ -0,0 +1,34 @@
+"""JSON encoding shared by the HTTP client and the event stream.
+
+Uses orjson when the ``speedups`` extra is installed and falls back to the
+standard library otherwise.  Both paths produce compact UTF-8 bytes from
+:func:`dumps` and accept ``str`` or ``bytes`` in :func:`loads`.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#: Whether :func:`loads` is backed by orjson (C, ~4x faster than ``json``).
+HAVE_ORJSON = orjson is not None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> bytes:
+        """Serialise *obj* to compact JSON bytes."""
+        return orjson.dumps(obj)
+
+else:
+    loads = json.loads
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        """Serialise *obj* to compact JSON bytes."""
+        return _encoder.encode(obj).encode()
@@ -4,32 +4,102 @@ from __future__ import annotations
 
 import hashlib
 import hmac
+import secrets
 import time
-import uuid
 from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Protocol
 
 from tuya_agent.config import TuyaConfig
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenInfo:
     access_token: str
     refresh_token: str
     expire_time: int
     acquired_at: float = field(default_factory=time.time)
 
+    @property
+    def renew_in(self) -> float:
+        """Seconds until the token should be replaced (negative if overdue)."""
+        # Renew 10 minutes early so no request goes out with a dying token.
+        return self.acquired_at + self.expire_time - 600 - time.time()
+
     @property
     def is_expired(self) -> bool:
-        # Treat the token as expired 5 minutes before actual expiry.
-        return time.time() >= self.acquired_at + self.expire_time - 300
+        return self.renew_in <= 0
+
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
 
+def _sha256(content: str | bytes) -> str:
+    # GET requests (including every token fetch) sign an empty body.
+    if not content:
+        return _EMPTY_SHA256
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
 
-def _sha256(content: str) -> str:
-    return hashlib.sha256(content.encode()).hexdigest()
 
+@lru_cache(maxsize=8)
+def _keyed_hmac(key: str) -> hmac.HMAC:
+    """Return an HMAC-SHA256 object with the key schedule already applied."""
+    return hmac.new(key.encode(), digestmod=hashlib.sha256)
 
-def _hmac_sha256(key: str, msg: str) -> str:
-    return hmac.new(key.encode(), msg.encode(), hashlib.sha256).hexdigest().upper()
+
+class Signer(Protocol):
+    def __call__(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: str | bytes = b"",
+        access_token: str = "",
+        t: int | None = None,
+        nonce: str | None = None,
+    ) -> dict[str, str]: ...
+
+
+def make_signer(config: TuyaConfig) -> Signer:
+    """Return a :func:`sign_request` equivalent specialised for ``config``.
+
+    The access ID and the keyed HMAC template are captured once, so each
+    call only does the per-request hashing and string work.
+    """
+    access_id = config.access_id
+    template = _keyed_hmac(config.access_secret)
+
+    def sign(
+        method: str,
+        path: str,
+        *,
+        body: str | bytes = b"",
+        access_token: str = "",
+        t: int | None = None,
+        nonce: str | None = None,
+    ) -> dict[str, str]:
+        ts = str(t or int(time.time() * 1000))
+        nonce = nonce or secrets.token_hex(16)
+        string_to_sign = f"{method.upper()}\n{_sha256(body)}\n\n{path}"
+
+        # Copying a pre-keyed HMAC skips re-deriving the inner/outer pads.
+        h = template.copy()
+        h.update(f"{access_id}{access_token}{ts}{nonce}{string_to_sign}".encode())
+
+        headers = {
+            "client_id": access_id,
+            "sign": h.hexdigest().upper(),
+            "t": ts,
+            "sign_method": "HMAC-SHA256",
+            "nonce": nonce,
+        }
+        if access_token:
+            headers["access_token"] = access_token
+        return headers
+
+    return sign
 
 
 def sign_request(
@@ -37,29 +107,17 @@ def sign_request(
     method: str,
     path: str,
     *,
-    body: str = "",
+    body: str | bytes = b"",
     access_token: str = "",
     t: int | None = None,
     nonce: str | None = None,
 ) -> dict[str, str]:
     """Build the signed headers required for a Tuya Cloud API request.
 
-    Returns a dict of headers to merge into the HTTP request.
+    ``body`` should be exactly the bytes sent on the wire; a ``str`` is
+    UTF-8 encoded.  Returns a dict of headers to merge into the HTTP request.
+    Callers signing many requests should hold on to :func:`make_signer`.
     """
-    t = t or int(time.time() * 1000)
-    nonce = nonce or uuid.uuid4().hex
-
-    content_hash = _sha256(body)
-    string_to_sign = f"{method.upper()}\n{content_hash}\n\n{path}"
-
-    sign_str = config.access_id + access_token + str(t) + nonce + string_to_sign
-    signature = _hmac_sha256(config.access_secret, sign_str)
-
-    return {
-        "client_id": config.access_id,
-        "sign": signature,
-        "t": str(t),
-        "sign_method": "HMAC-SHA256",
-        "nonce": nonce,
-        **({"access_token": access_token} if access_token else {}),
-    }
+    return make_signer(config)(
+        method, path, body=body, access_token=access_token, t=t, nonce=nonce,
+    )
@@ -2,14 +2,51 @@
 
 from __future__ import annotations
 
-import json
-from typing import Any
+import asyncio
+import logging
+import ssl
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from functools import lru_cache
+from typing import Any, TypeVar
 
 import httpx
 
-from tuya_agent.auth import TokenInfo, sign_request
+from tuya_agent._json import dumps, loads
+from tuya_agent.auth import TokenInfo, make_signer
 from tuya_agent.config import TuyaConfig
 
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Responses at least this large are JSON-decoded in a worker thread so a
+# big log page does not stall other in-flight requests.
+_OFFLOAD_DECODE_BYTES = 16 * 1024
+
+# Idle pooled connections are held long enough to be reused across the
+# collector's page-delay gaps.  The pool size is ``config.max_concurrency``.
+_POOL_KEEPALIVE_EXPIRY = 60
+
+# Upper bound on distinct ``cache_ttl`` responses kept per client.
+_CACHE_MAX_ENTRIES = 512
+
+# Floor for the background renewal sleep, also used as the retry delay
+# after a failed renewal.
+_MIN_RENEW_DELAY = 30
+
+
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """Return the TLS context shared by every client in the process.
+
+    Loading the CA bundle takes tens of milliseconds, and httpx would
+    otherwise repeat it for each transport.
+    """
+    return httpx.create_ssl_context()
+
 
 class TuyaAPIError(Exception):
     """Raised when the Tuya API returns a non-success response."""
@@ -20,6 +57,118 @@ class TuyaAPIError(Exception):
         super().__init__(f"Tuya API error {code}: {msg}")
 
 
+def run(main: Coroutine[Any, Any, _T]) -> _T:
+    """Run *main* like :func:`asyncio.run`, on uvloop when it is installed.
+
+    uvloop ships with ``uvicorn[standard]`` and makes the socket paths (Pulsar
+    frames, HTTP requests) noticeably cheaper; without it this is plain
+    :func:`asyncio.run`.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(main)
+    # 3.10 has no loop_factory; swap the policy only for this call so later
+    # asyncio.run() calls in the host process keep their own loop.
+    previous = asyncio.get_event_loop_policy()
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        return asyncio.run(main)
+    finally:
+        asyncio.set_event_loop_policy(previous)
+
+
+async def iter_pages(
+    fetch: Callable[[str | None], Awaitable[Any]],
+    items_key: str,
+    cursor_key: str,
+    more_key: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield the items of a cursor-paginated endpoint, one page ahead.
+
+    ``fetch(cursor)`` returns one page (``cursor`` is ``None`` for the first).
+    The next page is requested before the current page's items are yielded,
+    so the round-trip overlaps the caller's processing.  Iteration stops on
+    an empty page, a missing or repeated cursor, or a falsy ``more_key``.
+    A plain list response is treated as the only page.
+    """
+    cursor: str | None = None
+    task: asyncio.Future[Any] | None = asyncio.ensure_future(fetch(None))
+    try:
+        while task is not None:
+            page = await task
+            task = None
+            if isinstance(page, list):
+                items = page
+            else:
+                items = page.get(items_key) or []
+                next_cursor = page.get(cursor_key) or None
+                has_more = page.get(more_key) if more_key else True
+                if items and has_more and next_cursor and next_cursor != cursor:
+                    cursor = next_cursor
+                    task = asyncio.ensure_future(fetch(cursor))
+            for item in items:
+                yield item
+    finally:
+        if task is not None:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # retrieved, so it is not reported as unhandled
+
+
+class _ResponseCache:
+    """TTL + LRU cache of request results keyed by method, path and params.
+
+    Entries hold the future of the request, so concurrent callers asking for
+    the same key share a single round-trip.  Failed requests are evicted
+    rather than cached.
+    """
+
+    def __init__(self, maxsize: int = _CACHE_MAX_ENTRIES) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[tuple[Any, ...], tuple[float, asyncio.Future[Any]]] = (
+            OrderedDict()
+        )
+
+    async def get(
+        self,
+        key: tuple[Any, ...],
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            future = entry[1]
+            logger.debug("Response cache hit: %s %s", key[0], key[1])
+        else:
+            logger.debug("Response cache miss: %s %s", key[0], key[1])
+            future = asyncio.ensure_future(fetch())
+            future.add_done_callback(lambda f: self._evict_failed(key, f))
+            self._entries[key] = (now + ttl, future)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        # Shield so one caller being cancelled does not cancel the shared fetch.
+        return await asyncio.shield(future)
+
+    def invalidate(self, path: str) -> None:
+        """Drop every cached response for ``path``, whatever its params."""
+        for key in [key for key in self._entries if key[1] == path]:
+            del self._entries[key]
+
+    def _evict_failed(self, key: tuple[Any, ...], future: asyncio.Future[Any]) -> None:
+        if future.cancelled() or future.exception() is not None:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is future:
+                del self._entries[key]
+
+
 class TuyaClient:
     """Async HTTP client for the Tuya Cloud API.
 
@@ -30,8 +179,33 @@ class TuyaClient:
 
     def __init__(self, config: TuyaConfig | None = None) -> None:
         self.config = config or TuyaConfig()  # type: ignore[call-arg]
-        self._http = httpx.AsyncClient(base_url=self.config.base_url, timeout=30)
+        self._http = httpx.AsyncClient(
+            base_url=self.config.base_url,
+            timeout=30,
+            # Limits are set on the transport: AsyncClient ignores its own
+            # ``limits`` once a transport is passed.  One retry covers a
+            # pooled connection the server closed while idle.
+            transport=httpx.AsyncHTTPTransport(
+                verify=_ssl_context(),
+                retries=1,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_concurrency,
+                    max_keepalive_connections=self.config.max_concurrency,
+                    keepalive_expiry=_POOL_KEEPALIVE_EXPIRY,
+                ),
+            ),
+        )
+        # Bounds in-flight requests to the pool size.  Bursts (an agent
+        # fanning out tool calls, a concurrent collection run) wait here
+        # rather than for a pooled connection, where httpx's pool timeout
+        # would turn the wait into an error.
+        self._request_slots = asyncio.Semaphore(self.config.max_concurrency)
+        self._sign = make_signer(self.config)
         self._token: TokenInfo | None = None
+        # Serialises token acquisition so concurrent requests share one fetch.
+        self._token_lock = asyncio.Lock()
+        self._renew_task: asyncio.Task[None] | None = None
+        self._cache = _ResponseCache()
 
         # Attach sub-modules.
         from tuya_agent.devices import DevicesMixin
@@ -66,34 +240,46 @@ class TuyaClient:
 
     async def __aenter__(self) -> TuyaClient:
         await self.ensure_token()
+        if self._renew_task is None:
+            self._renew_task = asyncio.create_task(self._renew_token_loop())
         return self
 
     async def __aexit__(self, *exc: object) -> None:
         await self.close()
 
     async def close(self) -> None:
-        await self._http.aclose()
+        task, self._renew_task = self._renew_task, None
+        try:
+            if task is not None:
+                task.cancel()
+                # wait() does not raise the task's own exception, so only a
+                # cancellation of close() itself propagates from here.
+                await asyncio.wait({task})
+                if not task.cancelled() and task.exception() is not None:
+                    logger.warning(
+                        "Background token renewal had stopped", exc_info=task.exception(),
+                    )
+        finally:
+            await self._http.aclose()
 
     # -- Token management ----------------------------------------------------
 
     async def ensure_token(self) -> str:
-        """Return a valid access token, fetching or refreshing as needed."""
+        """Return a valid access token, fetching a new one if needed."""
         if self._token and not self._token.is_expired:
             return self._token.access_token
 
-        if self._token and self._token.refresh_token:
-            try:
-                return await self._refresh_token()
-            except TuyaAPIError:
-                pass  # Fall through to a fresh token request.
-
-        return await self._fetch_token()
+        async with self._token_lock:
+            # Another task may have renewed the token while we waited.
+            if self._token and not self._token.is_expired:
+                return self._token.access_token
+            return await self._fetch_token()
 
     async def _fetch_token(self) -> str:
         path = "/v1.0/token?grant_type=1"
-        headers = sign_request(self.config, "GET", path)
+        headers = self._sign("GET", path)
         resp = await self._http.get(path, headers=headers)
-        data = resp.json()
+        data = await self._decode(resp)
         self._check_response(data)
         result = data["result"]
         self._token = TokenInfo(
@@ -103,20 +289,22 @@ class TuyaClient:
         )
         return self._token.access_token
 
-    async def _refresh_token(self) -> str:
-        assert self._token is not None
-        path = f"/v1.0/token/{self._token.refresh_token}"
-        headers = sign_request(self.config, "GET", path)
-        resp = await self._http.get(path, headers=headers)
-        data = resp.json()
-        self._check_response(data)
-        result = data["result"]
-        self._token = TokenInfo(
-            access_token=result["access_token"],
-            refresh_token=result["refresh_token"],
-            expire_time=result["expire_time"],
-        )
-        return self._token.access_token
+    async def _renew_token_loop(self) -> None:
+        """Replace the token shortly before it expires, off the request path.
+
+        Started by ``async with``; requests made outside a context manager
+        still renew on demand through :meth:`ensure_token`.
+        """
+        while True:
+            delay = self._token.renew_in if self._token else 0
+            await asyncio.sleep(max(delay, _MIN_RENEW_DELAY))
+            try:
+                async with self._token_lock:
+                    await self._fetch_token()
+            except Exception:
+                # Anything from a Tuya error to an HTML 502 page: keep the
+                # loop alive, ensure_token() still renews on demand.
+                logger.warning("Background token renewal failed", exc_info=True)
 
     # -- Generic request -----------------------------------------------------
 
@@ -127,42 +315,74 @@ class TuyaClient:
         *,
         body: dict[str, Any] | None = None,
         params: dict[str, Any] | None = None,
+        cache_ttl: float = 0,
+    ) -> Any:
+        """Make a signed API request and return the ``result`` field.
+
+        Entries in ``params`` whose value is ``None`` are omitted.  With a
+        positive ``cache_ttl`` the result is reused for that many seconds by
+        identical body-less requests; treat cached results as read-only.
+        """
+        if cache_ttl > 0 and body is None:
+            key = (method, path, tuple(sorted((params or {}).items())))
+            return await self._cache.get(
+                key, cache_ttl, lambda: self._send(method, path, body=None, params=params)
+            )
+        return await self._send(method, path, body=body, params=params)
+
+    def invalidate_cache(self, path: str) -> None:
+        """Forget cached ``cache_ttl`` responses for ``path``."""
+        self._cache.invalidate(path)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: dict[str, Any] | None,
+        params: dict[str, Any] | None,
     ) -> Any:
-        """Make a signed API request and return the ``result`` field."""
         token = await self.ensure_token()
+        # Sign just before sending: a request that waited for a slot must
+        # not go out with a stale timestamp.
+        async with self._request_slots:
+            # Build the full path including query parameters for signing.  Unset
+            # values are dropped from what is sent too: httpx would otherwise
+            # send ``key=`` for them, which the signature does not cover.  Tuya
+            # signs the raw (not percent-encoded) values, so no urlencode here.
+            if params:
+                params = {k: v for k, v in sorted(params.items()) if v is not None}
+                query = "&".join([f"{k}={v}" for k, v in params.items()])
+                sign_path = f"{path}?{query}" if query else path
+            else:
+                sign_path = path
 
-        # Build the full path including query parameters for signing.
-        if params:
-            query = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
-            sign_path = f"{path}?{query}" if query else path
-        else:
-            sign_path = path
-            query = ""
-
-        body_str = json.dumps(body) if body else ""
-        headers = sign_request(
-            self.config,
-            method,
-            sign_path,
-            body=body_str,
-            access_token=token,
-        )
-        if body is not None:
-            headers["Content-Type"] = "application/json"
-
-        resp = await self._http.request(
-            method,
-            path,
-            headers=headers,
-            content=body_str if body else None,
-            params=params,
-        )
-        data = resp.json()
+            body_bytes = dumps(body) if body else b""
+            headers = self._sign(method, sign_path, body=body_bytes, access_token=token)
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+
+            resp = await self._http.request(
+                method,
+                path,
+                headers=headers,
+                content=body_bytes or None,
+                params=params,
+            )
+        # The body is already read, so the connection (and slot) is free.
+        data = await self._decode(resp)
         self._check_response(data)
         return data.get("result")
 
     # -- Helpers -------------------------------------------------------------
 
+    @staticmethod
+    async def _decode(resp: httpx.Response) -> Any:
+        raw = resp.content
+        if len(raw) < _OFFLOAD_DECODE_BYTES:
+            return loads(raw)
+        return await asyncio.to_thread(loads, raw)
+
     @staticmethod
     def _check_response(data: dict[str, Any]) -> None:
         if not data.get("success", False):
@@ -20,11 +20,12 @@ REQUEST_DELAY = 2.5  # seconds between API calls
 PAGE_SIZE = 50
 MAX_PAGES_PER_DEVICE = 100
 MAX_RETRIES = 3
+MAX_CONCURRENCY = 6  # devices collected in parallel
 
 RATE_LIMIT_CODE = 40000309
 
 
-@dataclass
+@dataclass(slots=True)
 class CollectorConfig:
     """Configuration for the log collector."""
 
@@ -33,9 +34,16 @@ class CollectorConfig:
     page_size: int = PAGE_SIZE
     event_types: str = "1,2,3,4,5,6,7,8,9,10"
     lookback_days: int = 7
+    max_concurrency: int = MAX_CONCURRENCY
 
+    def __post_init__(self) -> None:
+        # Normalise once (trim, drop blanks and repeats) so every page request
+        # reuses the same ready-to-send CSV.
+        codes = (c.strip() for c in self.event_types.split(","))
+        self.event_types = ",".join(dict.fromkeys(c for c in codes if c))
 
-@dataclass
+
+@dataclass(slots=True)
 class CollectionResult:
     """Summary of a single collection run."""
 
@@ -59,6 +67,7 @@ class LogCollector:
         self._client = client
         self._storage = storage
         self._config = config or CollectorConfig()
+        self._stop = asyncio.Event()
 
     # -- Device discovery ----------------------------------------------------
 
@@ -66,9 +75,11 @@ class LogCollector:
         """List all devices in the cloud project, handling pagination."""
         devices: list[dict[str, Any]] = []
         last_row_key: str | None = None
+        list_devices = self._client.devices.list
+        delay = self._config.request_delay
 
         while True:
-            result = await self._client.devices.list(
+            result = await list_devices(
                 page_size=20, last_row_key=last_row_key,
             )
             # The API may return a plain list or a dict with "list" key.
@@ -81,7 +92,7 @@ class LogCollector:
             last_row_key = result.get("last_row_key", "")
             if not batch or not last_row_key:
                 break
-            await asyncio.sleep(self._config.request_delay)
+            await asyncio.sleep(delay)
 
         logger.info("Discovered %d devices", len(devices))
         return devices
@@ -93,36 +104,62 @@ class LogCollector:
         device_id: str,
         start_time: int,
         end_time: int,
-    ) -> list[LogRecord]:
-        """Fetch all log pages for a device within the time range."""
+    ) -> tuple[list[LogRecord], int]:
+        """Fetch all log pages for a device within the time range.
+
+        Returns ``(records, max_event_time)``; the latter is 0 when no
+        records were found.  The next page is requested (after
+        ``request_delay``) before the current one is parsed, so parsing
+        overlaps the rate-limit pause and the network round-trip.
+        """
         records: list[LogRecord] = []
+        max_time = 0
         last_row_key: str | None = None
         prev_row_key: str | None = None
         page = 0
+        # Hoisted out of the page loop.
+        fetch = self._fetch_logs_page
+        delay = self._config.request_delay
+        from_api = LogRecord.from_api
+        append = records.append
+
+        pending: asyncio.Future[dict[str, Any] | None] | None = asyncio.ensure_future(
+            fetch(device_id, start_time, end_time, None),
+        )
+        try:
+            while pending is not None:
+                data = await pending
+                pending = None
+                if data is None:
+                    break
+                page += 1
+
+                new_row_key = data.get("next_row_key", "")
+                if (
+                    data.get("has_next")
+                    and new_row_key
+                    and new_row_key != prev_row_key
+                    and page < MAX_PAGES_PER_DEVICE
+                ):
+                    prev_row_key = last_row_key
+                    last_row_key = new_row_key
+                    pending = asyncio.ensure_future(
+                        fetch(
+                            device_id, start_time, end_time, last_row_key,
+                            delay=delay,
+                        ),
+                    )
 
-        while page < MAX_PAGES_PER_DEVICE:
-            data = await self._fetch_logs_page(
-                device_id, start_time, end_time, last_row_key,
-            )
-            if data is None:
-                break
-
-            for entry in data.get("logs", []):
-                records.append(LogRecord.from_api(device_id, entry))
-
-            if not data.get("has_next"):
-                break
-
-            new_row_key = data.get("next_row_key", "")
-            if not new_row_key or new_row_key == prev_row_key:
-                break
-
-            prev_row_key = last_row_key
-            last_row_key = new_row_key
-            page += 1
-            await asyncio.sleep(self._config.request_delay)
+                for entry in data.get("logs", ()):
+                    record = from_api(device_id, entry)
+                    append(record)
+                    if record.event_time > max_time:
+                        max_time = record.event_time
+        finally:
+            if pending is not None:
+                pending.cancel()
 
-        return records
+        return records, max_time
 
     async def _fetch_logs_page(
         self,
@@ -130,16 +167,26 @@ class LogCollector:
         start_time: int,
         end_time: int,
         last_row_key: str | None,
+        *,
+        delay: float = 0,
     ) -> dict[str, Any] | None:
-        """Fetch a single page of logs with retry on rate limit."""
+        """Fetch a single page of logs with retry on rate limit.
+
+        Waits ``delay`` seconds before the first attempt.
+        """
+        if delay:
+            await asyncio.sleep(delay)
+        get_device_logs = self._client.logs.get_device_logs
+        event_types = self._config.event_types
+        page_size = self._config.page_size
         for attempt in range(MAX_RETRIES):
             try:
-                return await self._client.logs.get_device_logs(
+                return await get_device_logs(
                     device_id,
                     start_time=start_time,
                     end_time=end_time,
-                    event_types=self._config.event_types,
-                    page_size=self._config.page_size,
+                    event_types=event_types,
+                    page_size=page_size,
                     last_row_key=last_row_key,
                 )
             except TuyaAPIError as exc:
@@ -167,23 +214,28 @@ class LogCollector:
             devices = await self.discover_devices()
             result.devices_found = len(devices)
 
-            for device in devices:
+            # Collect several devices at once; pacing between pages of the
+            # same device still happens inside ``collect_device_logs``.
+            sem = asyncio.Semaphore(max(1, self._config.max_concurrency))
+
+            async def _guarded(device: dict[str, Any]) -> None:
                 device_id = device.get("id", "")
                 device_name = device.get("customName") or device.get("name", "")
                 if not device_id:
-                    continue
-
-                try:
-                    await self._collect_one_device(
-                        device_id, device_name, result,
-                    )
-                except Exception as exc:
-                    result.devices_failed += 1
-                    msg = f"{device_name} ({device_id}): {exc}"
-                    result.errors.append(msg)
-                    logger.error("Failed to collect %s: %s", device_id, exc)
-
-                await asyncio.sleep(self._config.request_delay)
+                    return
+
+                async with sem:
+                    try:
+                        await self._collect_one_device(
+                            device_id, device_name, result,
+                        )
+                    except Exception as exc:
+                        result.devices_failed += 1
+                        msg = f"{device_name} ({device_id}): {exc}"
+                        result.errors.append(msg)
+                        logger.error("Failed to collect %s: %s", device_id, exc)
+
+            await asyncio.gather(*(_guarded(device) for device in devices))
         finally:
             result.duration_seconds = time.monotonic() - t0
             status = "completed" if not result.errors else "completed_with_errors"
@@ -193,6 +245,7 @@ class LogCollector:
                 logs=result.logs_collected,
                 status=status,
             )
+            self._storage.checkpoint()
 
         logger.info(
             "Collection complete: %d logs from %d/%d devices in %.1fs",
@@ -220,14 +273,16 @@ class LogCollector:
             lookback_ms = self._config.lookback_days * 24 * 60 * 60 * 1000
             start_time = now_ms - lookback_ms
 
-        records = await self.collect_device_logs(
+        records, max_time = await self.collect_device_logs(
             device_id, start_time, now_ms,
         )
 
         if records:
-            inserted = self._storage.insert_logs(records)
-            max_time = max(r.event_time for r in records)
-            self._storage.set_device_bookmark(device_id, max_time)
+            # Logs and bookmark land in one transaction so a crash cannot
+            # advance the bookmark past rows that were never written.
+            with self._storage.transaction():
+                inserted = self._storage.insert_logs(records)
+                self._storage.set_device_bookmark(device_id, max_time)
             result.logs_collected += inserted
             logger.info(
                 "  %s: %d logs fetched, %d new",
@@ -241,12 +296,18 @@ class LogCollector:
     # -- Daemon mode ---------------------------------------------------------
 
     async def run_daemon(self) -> None:
-        """Run the collector in a loop, sleeping between runs."""
+        """Run the collector on a fixed schedule until :meth:`stop` is called.
+
+        Runs start ``poll_interval`` seconds apart measured from the start
+        of the previous run (on the monotonic clock), so a slow run does not
+        push every later run back.
+        """
         logger.info(
             "Starting log collector daemon (interval=%ds)",
             self._config.poll_interval,
         )
-        while True:
+        while not self._stop.is_set():
+            next_run = time.monotonic() + self._config.poll_interval
             try:
                 result = await self.collect_all()
                 if result.errors:
@@ -255,8 +316,14 @@ class LogCollector:
             except Exception:
                 logger.exception("Collection run failed")
 
-            logger.info(
-                "Sleeping %ds until next run...",
-                self._config.poll_interval,
-            )
-            await asyncio.sleep(self._config.poll_interval)
+            sleep_for = max(0.0, next_run - time.monotonic())
+            logger.info("Sleeping %ds until next run...", sleep_for)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=sleep_for)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Log collector daemon stopped")
+
+    def stop(self) -> None:
+        """Ask :meth:`run_daemon` to return once the current run finishes."""
+        self._stop.set()
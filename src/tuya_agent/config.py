@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from functools import cached_property
+
 from pydantic_settings import BaseSettings
 
 _BASE_URLS: dict[str, str] = {
@@ -28,8 +30,14 @@ class TuyaConfig(BaseSettings):
     access_id: str
     access_secret: str
     api_region: str = "us"
+    # Most HTTP requests one client has in flight; also the connection
+    # pool size, so requests queue in the client instead of the pool.
+    max_concurrency: int = 32
+
+    # Both URLs are resolved once per instance; the region does not change
+    # after the settings are loaded.
 
-    @property
+    @cached_property
     def base_url(self) -> str:
         url = _BASE_URLS.get(self.api_region)
         if url is None:
@@ -38,7 +46,7 @@ class TuyaConfig(BaseSettings):
             )
         return url
 
-    @property
+    @cached_property
     def pulsar_url(self) -> str:
         url = _PULSAR_URLS.get(self.api_region)
         if url is None:
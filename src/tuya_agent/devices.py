@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING, Any
 
+from tuya_agent.client import iter_pages
+
 if TYPE_CHECKING:
     from tuya_agent.client import TuyaClient
 
+# Specifications and function sets only change with device firmware.
+_SPEC_CACHE_TTL = 3600
+# Device details carry online state and the last reported status, so they are
+# only reused briefly; commands sent through this client drop the entry.
+_DEVICE_CACHE_TTL = 30
+
 
 class DevicesMixin:
     """Methods for listing, inspecting, and controlling Tuya devices."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -25,14 +36,27 @@ class DevicesMixin:
         Returns a dict with ``list`` (device records) and ``last_row_key``
         for pagination.
         """
-        params: dict[str, Any] = {"page_size": page_size}
-        if last_row_key:
-            params["last_row_key"] = last_row_key
+        params = {"page_size": page_size, "last_row_key": last_row_key or None}
         return await self._client.request("GET", "/v2.0/cloud/thing/device", params=params)
 
-    async def get(self, device_id: str) -> dict[str, Any]:
-        """Get full details for a single device."""
-        return await self._client.request("GET", f"/v1.0/devices/{device_id}")
+    def iter_devices(self, *, page_size: int = 20) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over every device, fetching the next page in the background."""
+        return iter_pages(
+            lambda cursor: self.list(page_size=page_size, last_row_key=cursor),
+            "list",
+            "last_row_key",
+        )
+
+    async def get(
+        self, device_id: str, *, cache_ttl: float = _DEVICE_CACHE_TTL
+    ) -> dict[str, Any]:
+        """Get full details for a single device.
+
+        Results are cached for ``cache_ttl`` seconds; pass ``0`` to bypass.
+        """
+        return await self._client.request(
+            "GET", f"/v1.0/devices/{device_id}", cache_ttl=cache_ttl
+        )
 
     async def get_status(self, device_id: str) -> list[dict[str, Any]]:
         """Get the current data-point status of a device."""
@@ -40,15 +64,27 @@ class DevicesMixin:
             "GET", f"/v1.0/iot-03/devices/{device_id}/status"
         )
 
-    async def get_specification(self, device_id: str) -> dict[str, Any]:
-        """Get the device specification including instruction set and status set."""
+    async def get_specification(
+        self, device_id: str, *, cache_ttl: float = _SPEC_CACHE_TTL
+    ) -> dict[str, Any]:
+        """Get the device specification including instruction set and status set.
+
+        Results are cached for ``cache_ttl`` seconds; pass ``0`` to bypass.
+        """
         return await self._client.request(
-            "GET", f"/v1.0/iot-03/devices/{device_id}/specification"
+            "GET", f"/v1.0/iot-03/devices/{device_id}/specification", cache_ttl=cache_ttl
         )
 
-    async def get_functions(self, device_id: str) -> dict[str, Any]:
-        """Get the supported controllable functions for a device."""
-        return await self._client.request("GET", f"/v1.0/devices/{device_id}/functions")
+    async def get_functions(
+        self, device_id: str, *, cache_ttl: float = _SPEC_CACHE_TTL
+    ) -> dict[str, Any]:
+        """Get the supported controllable functions for a device.
+
+        Results are cached for ``cache_ttl`` seconds; pass ``0`` to bypass.
+        """
+        return await self._client.request(
+            "GET", f"/v1.0/devices/{device_id}/functions", cache_ttl=cache_ttl
+        )
 
     async def send_commands(
         self,
@@ -66,6 +102,7 @@ class DevicesMixin:
             f"/v1.0/iot-03/devices/{device_id}/commands",
             body={"commands": commands},
         )
+        self._client.invalidate_cache(f"/v1.0/devices/{device_id}")
         return True
 
     async def get_sub_devices(self, gateway_id: str) -> list[dict[str, Any]]:
@@ -3,26 +3,53 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import hashlib
+import inspect
 import json
 import logging
+import random
 import time
+from binascii import a2b_base64
 from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import TYPE_CHECKING, Any
 
 import websockets
 from Crypto.Cipher import AES
 from websockets.asyncio.client import ClientConnection
 
+from tuya_agent._json import HAVE_ORJSON, loads
+
 if TYPE_CHECKING:
     from tuya_agent.client import TuyaClient
 
 logger = logging.getLogger(__name__)
 
+# A frame over ``max_size`` closes the connection, and Pulsar then
+# redelivers it after every reconnect, so allow well above the 1 MiB
+# default.  A deeper receive queue absorbs bursts while events are handled.
+_WS_MAX_SIZE = 4 * 1024 * 1024
+_WS_MAX_QUEUE = 64
+
+# After the socket drops, wait base * 2**n seconds (capped, with +/-50%
+# jitter so many clients do not reconnect in lockstep), where n counts
+# consecutive drops without a message in between.
+_RECONNECT_BASE_DELAY = 1.0
+_RECONNECT_MAX_DELAY = 60.0
+
+# Pulsar delivers at least once: messages that were in flight (unacked)
+# when a connection dropped come again, with the same message id, after
+# the reconnect.  Remember this many recent ids per subscription.
+_RECENT_MESSAGE_IDS = 1024
+
+# When a subscription ends, queued ``on_event`` calls get this long to
+# finish before the worker is cancelled, so a hung callback cannot block
+# shutdown.
+_CALLBACK_DRAIN_TIMEOUT = 5.0
 
-@dataclass
+
+@dataclass(slots=True)
 class TuyaEvent:
     """A decoded real-time event from the Tuya Pulsar stream."""
 
@@ -31,14 +58,25 @@ class TuyaEvent:
     product_id: str
     data: dict[str, Any]
     timestamp: int
-    raw: dict[str, Any] = field(repr=False)
+    # The full decoded payload, only kept when subscribing with keep_raw=True.
+    raw: dict[str, Any] | None = field(default=None, repr=False)
+    # The payload JSON exactly as received, kept alongside ``raw`` so it can
+    # be stored without serialising the dict again.
+    raw_json: bytes | None = field(default=None, repr=False)
 
 
 class EventsMixin:
     """Real-time device event subscription via Tuya's Pulsar WebSocket service."""
 
+    __slots__ = ("_client", "_auth_headers")
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
+        self._auth_headers = self._ws_headers()
+
+    def refresh_auth(self) -> None:
+        """Recompute the WebSocket auth headers after the credentials change."""
+        self._auth_headers = self._ws_headers()
 
     def _build_ws_url(self) -> str:
         config = self._client.config
@@ -64,43 +102,78 @@ class EventsMixin:
         *,
         on_event: Callable[[TuyaEvent], Any] | None = None,
         max_events: int | None = None,
+        keep_raw: bool = False,
     ) -> AsyncIterator[TuyaEvent]:
         """Connect to the Tuya Pulsar WebSocket and yield events.
 
-        If ``on_event`` is provided it is called for each event in addition to
-        yielding.  If ``max_events`` is set the iterator stops after that many
-        events.
+        If ``on_event`` is provided it is also called for each event, in
+        order, from a worker task fed by a bounded queue, so a slow callback
+        does not stall reading and acking.  It may be a coroutine function,
+        or a plain function, which is run in a worker thread; exceptions it
+        raises are logged.  If
+        ``max_events`` is set the iterator stops after that many events.
+        The full decoded payload is only attached as ``event.raw`` (and its
+        JSON bytes as ``event.raw_json``) when ``keep_raw`` is true.
         """
         url = self._build_ws_url()
-        headers = self._ws_headers()
+        headers = self._auth_headers
 
         secret = self._client.config.access_secret
+        callbacks = _CallbackWorker(on_event) if on_event else None
+        recent = _RecentIds(_RECENT_MESSAGE_IDS)
         count = 0
-        async for ws in websockets.connect(url, additional_headers=headers):
-            try:
-                async for raw_msg in ws:
-                    try:
-                        msg = json.loads(raw_msg)
-                        event = _decode_message(msg, access_secret=secret)
-                    except Exception:
-                        logger.warning("Failed to decode Pulsar message", exc_info=True)
-                        await _ack(ws, msg.get("messageId", ""))
-                        continue
-
-                    if event is not None:
-                        if on_event:
-                            on_event(event)
-                        yield event
-                        count += 1
-
-                    await _ack(ws, msg.get("messageId", ""))
-
-                    if max_events and count >= max_events:
-                        return
-            except websockets.ConnectionClosed:
-                logger.info("Pulsar WebSocket closed, reconnecting...")
-                await asyncio.sleep(1)
-                continue
+        drops = 0
+        try:
+            async for ws in websockets.connect(
+                url,
+                additional_headers=headers,
+                max_size=_WS_MAX_SIZE,
+                max_queue=_WS_MAX_QUEUE,
+            ):
+                acks = _AckBatcher(ws)
+                try:
+                    async for raw_msg in ws:
+                        drops = 0
+                        message_id = ""
+                        try:
+                            message_id, payload_b64 = _split_envelope(raw_msg)
+                            if not recent.add(message_id):
+                                # Redelivery of a message already yielded:
+                                # ack it again without decrypting it.
+                                logger.debug("Skipping redelivered message %s", message_id)
+                                acks.add(message_id)
+                                continue
+                            event = _decode_payload(
+                                payload_b64, access_secret=secret, keep_raw=keep_raw
+                            )
+                        except Exception:
+                            logger.warning("Failed to decode Pulsar message", exc_info=True)
+                            acks.add(message_id)
+                            continue
+
+                        if event is not None:
+                            if callbacks:
+                                await callbacks.put(event)
+                            yield event
+                            count += 1
+
+                        acks.add(message_id)
+
+                        if max_events and count >= max_events:
+                            return
+                except websockets.ConnectionClosed:
+                    delay = _reconnect_delay(drops)
+                    drops += 1
+                    logger.info("Pulsar WebSocket closed, reconnecting in %.1f s", delay)
+                    await asyncio.sleep(delay)
+                    continue
+                finally:
+                    await acks.aclose()
+        finally:
+            if recent.skipped:
+                logger.info("Skipped %d redelivered Pulsar messages", recent.skipped)
+            if callbacks:
+                await callbacks.aclose()
 
     async def collect(
         self,
@@ -108,58 +181,101 @@ class EventsMixin:
         duration_seconds: float = 60,
         max_events: int | None = None,
     ) -> list[TuyaEvent]:
-        """Collect events for up to ``duration_seconds`` and return them as a list."""
+        """Collect events for up to ``duration_seconds`` and return them as a list.
+
+        The whole drain runs under a single timeout, and the stream is always
+        closed (flushing pending acks) before returning.
+        """
         events: list[TuyaEvent] = []
+        stream = self.subscribe(max_events=max_events)
 
-        async def _gather() -> None:
-            async for event in self.subscribe(max_events=max_events):
+        async def _drain() -> None:
+            async for event in stream:
                 events.append(event)
 
         try:
-            await asyncio.wait_for(_gather(), timeout=duration_seconds)
-        except (asyncio.TimeoutError, StopAsyncIteration):
+            # One timeout around the whole drain: a wait_for per event would
+            # spawn a task for every message received.
+            await asyncio.wait_for(_drain(), timeout=duration_seconds)
+        except asyncio.TimeoutError:
             pass
+        finally:
+            # Close the stream explicitly so pending acks are flushed and the
+            # socket is shut down now rather than when the generator is GC'd.
+            await stream.aclose()
         return events
 
 
 # -- helpers -----------------------------------------------------------------
 
 
+@lru_cache(maxsize=8)
 def _ws_password(access_id: str, access_secret: str) -> str:
     """Compute the Pulsar WebSocket password as md5(access_id + md5(access_secret))[8:24]."""
     secret_hash = hashlib.md5(access_secret.encode()).hexdigest()
     return hashlib.md5((access_id + secret_hash).encode()).hexdigest()[8:24]
 
 
-def _decrypt_payload(payload_b64: str, access_secret: str) -> str:
+def _decrypt_payload(payload_b64: str, access_secret: str) -> bytes:
     """Decrypt an AES-ECB-encrypted Pulsar payload.
 
     The key is ``access_secret[8:24]`` (16 bytes for AES-128).
-    The ciphertext is base64-encoded and PKCS7-padded.
+    The ciphertext is base64-encoded and PKCS7-padded.  The plaintext is
+    returned as UTF-8 bytes, which the JSON parser accepts directly.
     """
-    raw = base64.b64decode(payload_b64)
+    raw = a2b_base64(payload_b64)
     key = access_secret[8:24].encode("utf-8")
     cipher = AES.new(key, AES.MODE_ECB)
     plaintext = cipher.decrypt(raw)
     # Strip PKCS7 padding.
     pad_len = plaintext[-1]
-    return plaintext[:-pad_len].decode("utf-8")
+    return plaintext[:-pad_len]
+
 
+def _scan_field(frame: str, marker: str) -> str | None:
+    start = frame.find(marker)
+    if start < 0 or frame.find(marker, start + 1) >= 0:
+        return None
+    start += len(marker)
+    end = frame.find('"', start)
+    value = frame[start:end]
+    return None if end < 0 or "\\" in value else value
 
-def _decode_message(
-    msg: dict[str, Any],
+
+def _split_envelope(frame: str | bytes) -> tuple[str, Any]:
+    """Return the ``(messageId, payload)`` of a Pulsar envelope.
+
+    Only those two fields are needed.  Without orjson, plain-string values
+    are sliced out with ``str.find``, which is about twice as fast as
+    ``json.loads``.  That path is only taken when each key occurs exactly
+    once, so a nested key can never be picked up by mistake; anything else
+    falls back to a full parse.  orjson parses faster than the scan, so it
+    is always used when installed.
+    """
+    if not HAVE_ORJSON and isinstance(frame, str):
+        message_id = _scan_field(frame, '"messageId":"')
+        payload_b64 = _scan_field(frame, '"payload":"')
+        if message_id is not None and payload_b64 is not None:
+            return message_id, payload_b64
+    msg = loads(frame)
+    return msg.get("messageId", ""), msg.get("payload")
+
+
+def _decode_payload(
+    payload_b64: str | None,
     access_secret: str | None = None,
+    *,
+    keep_raw: bool = False,
 ) -> TuyaEvent | None:
-    payload_b64 = msg.get("payload")
     if not payload_b64:
         return None
     try:
         if access_secret:
-            payload_str = _decrypt_payload(payload_b64, access_secret)
+            payload_bytes = _decrypt_payload(payload_b64, access_secret)
         else:
             # Fallback for unencrypted payloads (e.g. in tests).
-            payload_str = base64.b64decode(payload_b64).decode("utf-8")
-        payload = json.loads(payload_str)
+            payload_bytes = a2b_base64(payload_b64)
+        payload = loads(payload_bytes)
     except Exception:
         logger.warning("Failed to decrypt/decode Pulsar payload", exc_info=True)
         return None
@@ -171,10 +287,193 @@ def _decode_message(
         product_id=payload.get("productKey", ""),
         data=data if isinstance(data, dict) else {"value": data},
         timestamp=payload.get("ts", int(time.time() * 1000)),
-        raw=payload,
+        raw=payload if keep_raw else None,
+        raw_json=payload_bytes if keep_raw else None,
     )
 
 
+def _reconnect_delay(attempt: int) -> float:
+    """Jittered exponential backoff before reconnect ``attempt`` (from 0)."""
+    delay = min(_RECONNECT_MAX_DELAY, _RECONNECT_BASE_DELAY * 2**attempt)
+    return delay * (0.5 + random.random())
+
+
+def _ack_frame(message_id: str) -> str:
+    """Build the Pulsar ack frame ``{"messageId":"..."}`` for *message_id*.
+
+    Pulsar message ids are base64 and never need escaping, so the frame is
+    formatted directly; anything unexpected goes through ``json.dumps``.
+    """
+    if '"' in message_id or "\\" in message_id:
+        return json.dumps({"messageId": message_id})
+    return f'{{"messageId":"{message_id}"}}'
+
+
 async def _ack(ws: ClientConnection, message_id: str) -> None:
     if message_id:
-        await ws.send(json.dumps({"messageId": message_id}))
+        await ws.send(_ack_frame(message_id))
+
+
+class _RecentIds:
+    """Bounded memory of recently seen message ids, oldest evicted first."""
+
+    __slots__ = ("_ids", "_maxlen", "skipped")
+
+    def __init__(self, maxlen: int) -> None:
+        self._ids: dict[str, None] = {}
+        self._maxlen = maxlen
+        self.skipped = 0
+
+    def add(self, message_id: str) -> bool:
+        """Record *message_id*; return False if it was already seen."""
+        if not message_id:
+            return True
+        ids = self._ids
+        if message_id in ids:
+            self.skipped += 1
+            return False
+        ids[message_id] = None
+        if len(ids) > self._maxlen:
+            del ids[next(iter(ids))]
+        return True
+
+
+class _CallbackWorker:
+    """Runs an ``on_event`` callback, in order, from a bounded queue.
+
+    When the queue is full :meth:`put` waits, which pushes back on the read
+    loop instead of dropping events.  Plain functions are run through
+    :func:`asyncio.to_thread`, so a blocking callback does not hold up the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[TuyaEvent], Any],
+        *,
+        maxsize: int = 1024,
+        drain_timeout: float = _CALLBACK_DRAIN_TIMEOUT,
+    ) -> None:
+        self._callback = callback
+        self._is_async = inspect.iscoroutinefunction(callback)
+        self._drain_timeout = drain_timeout
+        self._queue: asyncio.Queue[TuyaEvent] = asyncio.Queue(maxsize)
+        self._saturated = False
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, event: TuyaEvent) -> None:
+        if self._queue.full() and not self._saturated:
+            self._saturated = True
+            logger.warning(
+                "on_event callback is falling behind (%d events queued)",
+                self._queue.qsize(),
+            )
+        await self._queue.put(event)
+
+    async def aclose(self) -> None:
+        """Wait briefly for queued events to be handled, then stop the worker."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self._drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "on_event callback did not finish; dropping %d queued events",
+                self._queue.qsize(),
+            )
+        finally:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            event = await self._queue.get()
+            try:
+                if self._is_async:
+                    result = self._callback(event)
+                else:
+                    result = await asyncio.to_thread(self._callback, event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("on_event callback failed")
+            finally:
+                self._queue.task_done()
+            if self._saturated and self._queue.empty():
+                self._saturated = False
+
+
+class _AckBatcher:
+    """Coalesces Pulsar acks and sends them from a background task.
+
+    Pulsar's WebSocket consumer needs one ack frame per message, so a flush
+    still sends every pending frame, but it does so in a single task
+    wake-up, either every ``flush_interval`` seconds or once ``max_batch``
+    ids are pending.  This keeps the read loop free of awaits.  The interval
+    has to stay well below the ``ackTimeoutMillis`` on the consumer URL.
+    """
+
+    def __init__(
+        self,
+        ws: ClientConnection,
+        *,
+        max_batch: int = 32,
+        flush_interval: float = 0.1,
+    ) -> None:
+        self._ws = ws
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._pending: list[str] = []
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def add(self, message_id: str) -> None:
+        if not message_id:
+            return
+        self._pending.append(message_id)
+        if len(self._pending) >= self._max_batch:
+            self._wakeup.set()
+
+    async def aclose(self) -> None:
+        """Stop the flush task and send whatever is still pending."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        try:
+            await self._flush()
+        except websockets.ConnectionClosed:
+            pass
+        except Exception:
+            logger.warning("Failed to send Pulsar acks", exc_info=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except websockets.ConnectionClosed:
+                # Unacked messages are redelivered after reconnecting.
+                self._pending.clear()
+                return
+            except Exception:
+                # The unsent ids stay pending for the next flush.
+                logger.warning("Failed to send Pulsar acks", exc_info=True)
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        sent = 0
+        try:
+            for message_id in pending:
+                await _ack(self._ws, message_id)
+                sent += 1
+        finally:
+            # Interrupted (cancelled by aclose(), or a send failed): put the
+            # unsent ids back ahead of any added meanwhile.
+            self._pending[:0] = pending[sent:]
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class FirmwareMixin:
     """Methods for querying and managing device firmware."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
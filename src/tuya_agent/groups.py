@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class GroupsMixin:
     """Methods for managing device groups."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
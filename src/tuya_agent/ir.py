@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class IRMixin:
     """Methods for controlling IR blasters and their virtual remotes."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class LocationMixin:
     """Methods for querying device location and geofences."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
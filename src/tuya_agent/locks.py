@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class LocksMixin:
     """Methods for smart lock control via the Tuya Smart Lock API."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING, Any
 
+from tuya_agent.client import iter_pages
+
 if TYPE_CHECKING:
     from tuya_agent.client import TuyaClient
 
+_STATISTIC_INTERVALS = ("quarters", "days", "weeks", "months")
+_VALID_INTERVALS = frozenset(_STATISTIC_INTERVALS)
+_INTERVAL_ERROR = f"interval must be one of {', '.join(_STATISTIC_INTERVALS)}"
+
 
 class LogsMixin:
     """Methods for querying device logs, status history, and statistics."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -33,18 +42,44 @@ class LogsMixin:
 
         Times are 13-digit Unix timestamps in milliseconds.
         """
-        params: dict[str, Any] = {
+        params = {
             "type": event_types,
             "start_time": start_time,
             "end_time": end_time,
             "size": page_size,
+            "last_row_key": last_row_key or None,
         }
-        if last_row_key:
-            params["last_row_key"] = last_row_key
         return await self._client.request(
             "GET", f"/v1.0/devices/{device_id}/logs", params=params
         )
 
+    def iter_device_logs(
+        self,
+        device_id: str,
+        *,
+        start_time: int,
+        end_time: int,
+        event_types: str = "1,2,3,4,5,6,7,8,9,10",
+        page_size: int = 20,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over every device event log in the time range.
+
+        The next page is fetched while the current one is being consumed.
+        """
+        return iter_pages(
+            lambda cursor: self.get_device_logs(
+                device_id,
+                start_time=start_time,
+                end_time=end_time,
+                event_types=event_types,
+                page_size=page_size,
+                last_row_key=cursor,
+            ),
+            "logs",
+            "next_row_key",
+            "has_next",
+        )
+
     # -- Data-point status history -------------------------------------------
 
     async def get_report_logs(
@@ -65,19 +100,43 @@ class LogsMixin:
         Returns a dict with ``logs`` (list of records) and ``last_row_key``
         for cursor-based pagination.
         """
-        params: dict[str, Any] = {
+        params = {
             "start_time": start_time,
             "end_time": end_time,
             "size": page_size,
+            "codes": codes or None,
+            "last_row_key": last_row_key or None,
         }
-        if codes:
-            params["codes"] = codes
-        if last_row_key:
-            params["last_row_key"] = last_row_key
         return await self._client.request(
             "GET", f"/v2.0/cloud/thing/{device_id}/report-logs", params=params
         )
 
+    def iter_report_logs(
+        self,
+        device_id: str,
+        *,
+        start_time: int,
+        end_time: int,
+        codes: str | None = None,
+        page_size: int = 20,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over every DP status report in the time range.
+
+        The next page is fetched while the current one is being consumed.
+        """
+        return iter_pages(
+            lambda cursor: self.get_report_logs(
+                device_id,
+                start_time=start_time,
+                end_time=end_time,
+                codes=codes,
+                page_size=page_size,
+                last_row_key=cursor,
+            ),
+            "logs",
+            "last_row_key",
+        )
+
     # -- Aggregated statistics -----------------------------------------------
 
     async def get_statistics(
@@ -94,9 +153,8 @@ class LogsMixin:
         ``interval`` can be one of: ``quarters`` (15 min), ``days``, ``weeks``,
         ``months``.  ``code`` is the DP code to aggregate (e.g. ``"cur_power"``).
         """
-        valid = {"quarters", "days", "weeks", "months"}
-        if interval not in valid:
-            raise ValueError(f"interval must be one of {valid}")
+        if interval not in _VALID_INTERVALS:
+            raise ValueError(_INTERVAL_ERROR)
         return await self._client.request(
             "GET",
             f"/v1.0/devices/{device_id}/statistics/{interval}",
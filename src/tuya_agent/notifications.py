@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class NotificationsMixin:
     """Methods for sending push notifications to Tuya app users."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
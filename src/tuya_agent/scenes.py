@@ -7,10 +7,17 @@ from typing import TYPE_CHECKING, Any
 if TYPE_CHECKING:
     from tuya_agent.client import TuyaClient
 
+# Rules can be edited from the Smart Life app at any time, so keep this short.
+# Changes made through this mixin drop the cached listing straight away.
+_RULES_CACHE_TTL = 60
+_RULES_PATH = "/v2.0/cloud/scene/rule"
+
 
 class ScenesMixin:
     """Methods for managing Tuya scenes (tap-to-run) and automations."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -23,21 +30,22 @@ class ScenesMixin:
         rule_type: str = "",
         page_no: int = 1,
         page_size: int = 50,
+        cache_ttl: float = _RULES_CACHE_TTL,
     ) -> dict[str, Any]:
         """List linkage rules (scenes + automations) in a space.
 
         ``rule_type``: ``"tap_to_run"`` for tap-to-run scenes,
         ``"automation"`` for automations, or ``""`` for both.
+        Results are cached for ``cache_ttl`` seconds; pass ``0`` to bypass.
         """
-        params: dict[str, Any] = {
+        params = {
             "space_id": space_id,
             "page_no": page_no,
             "page_size": page_size,
+            "type": rule_type or None,
         }
-        if rule_type:
-            params["type"] = rule_type
         return await self._client.request(
-            "GET", "/v2.0/cloud/scene/rule", params=params,
+            "GET", _RULES_PATH, params=params, cache_ttl=cache_ttl,
         )
 
     async def trigger_rule(self, rule_id: str) -> bool:
@@ -76,15 +84,18 @@ class ScenesMixin:
         body: dict[str, Any] = {"name": name, "actions": actions}
         if background:
             body["background"] = background
-        return await self._client.request(
+        result = await self._client.request(
             "POST", f"/v1.0/homes/{home_id}/scenes", body=body
         )
+        self._client.invalidate_cache(_RULES_PATH)
+        return result
 
     async def delete_scene(self, home_id: str, scene_id: str) -> bool:
         """Delete a tap-to-run scene."""
         await self._client.request(
             "DELETE", f"/v1.0/homes/{home_id}/scenes/{scene_id}"
         )
+        self._client.invalidate_cache(_RULES_PATH)
         return True
 
     # -- Automations ---------------------------------------------------------
@@ -120,15 +131,18 @@ class ScenesMixin:
         }
         if preconditions:
             body["preconditions"] = preconditions
-        return await self._client.request(
+        result = await self._client.request(
             "POST", f"/v1.0/homes/{home_id}/automations", body=body
         )
+        self._client.invalidate_cache(_RULES_PATH)
+        return result
 
     async def enable_automation(self, home_id: str, automation_id: str) -> bool:
         """Enable a disabled automation."""
         await self._client.request(
             "PUT", f"/v1.0/homes/{home_id}/automations/{automation_id}/actions/enable"
         )
+        self._client.invalidate_cache(_RULES_PATH)
         return True
 
     async def disable_automation(self, home_id: str, automation_id: str) -> bool:
@@ -136,4 +150,5 @@ class ScenesMixin:
         await self._client.request(
             "PUT", f"/v1.0/homes/{home_id}/automations/{automation_id}/actions/disable"
         )
+        self._client.invalidate_cache(_RULES_PATH)
         return True
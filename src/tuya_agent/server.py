@@ -7,13 +7,14 @@ provides a Server-Sent Events stream for real-time device events.
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from collections.abc import AsyncGenerator
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 import websockets
 from fastapi import FastAPI, Query, Request
@@ -21,12 +22,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from tuya_agent._json import dumps
 from tuya_agent.client import TuyaAPIError, TuyaClient
 from tuya_agent.events import TuyaEvent
 from tuya_agent.storage import LogStorage
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# Read connections kept open for the /api/logs* endpoints.
+_STORAGE_READERS = 4
+
 # ---------------------------------------------------------------------------
 # Pydantic request / response models
 # ---------------------------------------------------------------------------
@@ -38,23 +45,86 @@ class SendCommandsRequest(BaseModel):
     commands: list[dict[str, Any]]
 
 
+class _DumpsJSONResponse(JSONResponse):
+    """JSONResponse rendered with the shared codec (orjson when installed).
+
+    Returning an instance from an endpoint also skips FastAPI's
+    ``jsonable_encoder`` walk, which dominates the cost of serialising a
+    1000-row ``/api/logs`` page.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
 # ---------------------------------------------------------------------------
 # EventBroadcaster — fans out Pulsar events to SSE clients
 # ---------------------------------------------------------------------------
 
 
+class BroadcastRing:
+    """Bounded history of SSE frames shared by every connected client.
+
+    Publishing appends one entry regardless of how many clients are
+    connected; each client keeps its own cursor (the last sequence number it
+    has seen).  A client that falls more than ``maxlen`` frames behind skips
+    the frames that have rotated out instead of being disconnected.
+    """
+
+    def __init__(self, maxlen: int = 256) -> None:
+        self._frames: deque[str] = deque(maxlen=maxlen)
+        self._seq = 0
+        # One future shared by every reader waiting for the next frame;
+        # created on first wait so the ring can be built outside a loop.
+        self._waiter: asyncio.Future[None] | None = None
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest frame (0 before the first)."""
+        return self._seq
+
+    def publish(self, frame: str) -> None:
+        self._frames.append(frame)
+        self._seq += 1
+        # Wake everyone waiting on the current future; the next wait makes
+        # a new one.
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def read(self, cursor: int, *, timeout: float) -> tuple[int, list[str]]:
+        """Return ``(new_cursor, frames)`` published after ``cursor``.
+
+        Waits up to ``timeout`` seconds when nothing newer is available, in
+        which case ``frames`` is empty.
+        """
+        if cursor >= self._seq:
+            waiter = self._waiter
+            if waiter is None:
+                waiter = self._waiter = asyncio.get_running_loop().create_future()
+            # asyncio.wait() on a bare future only adds a done-callback and
+            # a timer handle, where wait_for() on Event.wait() also wraps
+            # the coroutine in a Task for every idle wait.
+            done, _ = await asyncio.wait((waiter,), timeout=timeout)
+            if not done:
+                return cursor, []
+        # Sequence numbers are contiguous, so the backlog is a deque suffix.
+        backlog = min(self._seq - cursor, len(self._frames))
+        start = len(self._frames) - backlog
+        return self._seq, list(islice(self._frames, start, None))
+
+
 @dataclass
 class EventBroadcaster:
     """Subscribes to Tuya Pulsar events and broadcasts them to SSE clients.
 
-    Each connected SSE client receives a copy of every event via its own
-    :class:`asyncio.Queue`.
+    Each event is serialised once into an SSE ``data:`` frame and published
+    to a shared :class:`BroadcastRing` that every client reads from.
     """
 
     client: TuyaClient
-    _subscribers: list[asyncio.Queue[dict[str, Any]]] = field(
-        default_factory=list,
-    )
+    _ring: BroadcastRing = field(default_factory=BroadcastRing, repr=False)
+    _clients: int = 0
     _task: asyncio.Task[None] | None = field(
         default=None, repr=False,
     )
@@ -68,7 +138,7 @@ class EventBroadcaster:
             logger.info("EventBroadcaster started")
 
     async def stop(self) -> None:
-        """Cancel the background task and drain subscriber queues."""
+        """Cancel the background Pulsar subscription task."""
         if self._task and not self._task.done():
             self._task.cancel()
             try:
@@ -76,32 +146,27 @@ class EventBroadcaster:
             except asyncio.CancelledError:
                 pass
         self._task = None
-        self._subscribers.clear()
         logger.info("EventBroadcaster stopped")
 
     # -- subscriber management -----------------------------------------------
 
-    def subscribe(self) -> asyncio.Queue[dict[str, Any]]:
-        """Register a new SSE client and return its event queue."""
-        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
-            maxsize=256,
-        )
-        self._subscribers.append(queue)
-        logger.debug(
-            "SSE client subscribed (%d total)", len(self._subscribers),
-        )
-        return queue
+    async def stream(self, *, keepalive: float = 30.0) -> AsyncIterator[str]:
+        """Yield SSE text for one client, starting from the next event.
 
-    def unsubscribe(self, queue: asyncio.Queue[dict[str, Any]]) -> None:
-        """Remove a previously registered SSE client queue."""
+        Frames that arrived together are yielded as one chunk; a keepalive
+        comment is yielded after ``keepalive`` idle seconds so proxies do
+        not time the connection out.
+        """
+        self._clients += 1
+        logger.debug("SSE client subscribed (%d total)", self._clients)
+        cursor = self._ring.seq
         try:
-            self._subscribers.remove(queue)
-        except ValueError:
-            pass
-        logger.debug(
-            "SSE client unsubscribed (%d remaining)",
-            len(self._subscribers),
-        )
+            while True:
+                cursor, frames = await self._ring.read(cursor, timeout=keepalive)
+                yield "".join(frames) if frames else ": keepalive\n\n"
+        finally:
+            self._clients -= 1
+            logger.debug("SSE client unsubscribed (%d remaining)", self._clients)
 
     # -- internal ------------------------------------------------------------
 
@@ -136,7 +201,9 @@ class EventBroadcaster:
                 await asyncio.sleep(5)
 
     def _fan_out(self, event: TuyaEvent) -> None:
-        """Push a serialised event dict to every subscriber queue."""
+        """Publish the event, serialised once as an SSE frame, to all clients."""
+        if not self._clients:
+            return
         payload = {
             "event_type": event.event_type,
             "device_id": event.device_id,
@@ -144,14 +211,7 @@ class EventBroadcaster:
             "data": event.data,
             "timestamp": event.timestamp,
         }
-        dead: list[asyncio.Queue[dict[str, Any]]] = []
-        for queue in self._subscribers:
-            try:
-                queue.put_nowait(payload)
-            except asyncio.QueueFull:
-                dead.append(queue)
-        for q in dead:
-            self.unsubscribe(q)
+        self._ring.publish(f"data: {dumps(payload).decode()}\n\n")
 
 
 # ---------------------------------------------------------------------------
@@ -171,20 +231,21 @@ def create_app(
 
     The private ``_test_state`` parameter is used by tests to inject
     pre-built ``client``, ``storage``, and ``broadcaster`` objects so
-    that the lifespan can be skipped.
+    that the lifespan can be skipped.  The dict itself becomes the app's
+    state holder, so a test can swap its entries between requests.
     """
 
     # Mutable holders so the lifespan can share state with endpoints.
-    state: dict[str, Any] = dict(_test_state) if _test_state else {}
+    state: dict[str, Any] = _test_state if _test_state is not None else {}
 
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-        if _test_state:
+        if _test_state is not None:
             yield
             return
 
         # -- startup ---------------------------------------------------------
-        storage = LogStorage(db_path)
+        storage = LogStorage(db_path, readers=_STORAGE_READERS)
         storage.open()
         logger.info("LogStorage opened at %s", db_path)
 
@@ -243,6 +304,12 @@ def create_app(
     def _storage() -> LogStorage:
         return state["storage"]
 
+    # sqlite3 blocks, so storage calls run in worker threads.  LogStorage
+    # hands each one a pooled read connection (or serialises them on its
+    # single connection), so no locking is needed here.
+    async def _run_db(fn: Callable[..., _T], /, *args: Any, **kwargs: Any) -> _T:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
     def _broadcaster() -> EventBroadcaster:
         return state["broadcaster"]
 
@@ -336,8 +403,9 @@ def create_app(
         code: str | None = Query(None),
         limit: int = Query(100, ge=1, le=1000),
         offset: int = Query(0, ge=0),
-    ) -> dict[str, Any]:
-        rows, total = _storage().query_logs(
+    ) -> JSONResponse:
+        rows, total = await _run_db(
+            _storage().query_logs,
             device_id=device_id,
             start_time=start_time,
             end_time=end_time,
@@ -345,25 +413,26 @@ def create_app(
             limit=limit,
             offset=offset,
         )
-        return {"logs": rows, "total": total}
+        return _DumpsJSONResponse({"logs": rows, "total": total})
 
     @app.get("/api/logs/stats")
     async def get_stats() -> dict[str, int]:
-        return _storage().get_stats()
+        return await _run_db(_storage().get_stats)
 
     @app.get("/api/logs/bookmarks")
-    async def get_bookmarks() -> list[dict[str, Any]]:
-        pairs = _storage().get_all_bookmarks()
-        return [
+    async def get_bookmarks() -> JSONResponse:
+        pairs = await _run_db(_storage().get_all_bookmarks)
+        return _DumpsJSONResponse([
             {"device_id": did, "last_event_time": ts}
             for did, ts in pairs
-        ]
+        ])
 
     @app.get("/api/logs/runs")
     async def get_runs(
         limit: int = Query(50, ge=1, le=500),
-    ) -> list[dict[str, Any]]:
-        return _storage().get_runs(limit=limit)
+    ) -> JSONResponse:
+        runs = await _run_db(_storage().get_runs, limit=limit)
+        return _DumpsJSONResponse(runs)
 
     # ===================================================================
     # Server-Sent Events (real-time stream)
@@ -372,25 +441,13 @@ def create_app(
     @app.get("/api/events/stream")
     async def event_stream() -> StreamingResponse:
         broadcaster = _broadcaster()
-        queue = broadcaster.subscribe()
 
         async def _generate() -> AsyncGenerator[str, None]:
             try:
-                while True:
-                    try:
-                        event = await asyncio.wait_for(
-                            queue.get(), timeout=30.0,
-                        )
-                        data = json.dumps(event)
-                        yield f"data: {data}\n\n"
-                    except asyncio.TimeoutError:
-                        # Send a keepalive comment to prevent
-                        # proxy / client timeouts.
-                        yield ": keepalive\n\n"
+                async for chunk in broadcaster.stream():
+                    yield chunk
             except asyncio.CancelledError:
                 pass
-            finally:
-                broadcaster.unsubscribe(queue)
 
         return StreamingResponse(
             _generate(),
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class SpacesMixin:
     """Methods for resolving Tuya spaces (locations)."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
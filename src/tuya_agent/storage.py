@@ -2,21 +2,31 @@
 
 from __future__ import annotations
 
-import json
 import logging
+import queue
 import sqlite3
+import threading
 import time
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+from tuya_agent._json import dumps
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_DB_PATH = Path("tuya_logs.db")
 
+# Plain INTEGER PRIMARY KEY (no AUTOINCREMENT): rowids still grow while no
+# rows are deleted from the end, and inserts skip the sqlite_sequence update.
+# Databases created with AUTOINCREMENT keep it; nothing depends on it.
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS device_logs (
-    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    id              INTEGER PRIMARY KEY,
     device_id       TEXT    NOT NULL,
     event_id        TEXT    NOT NULL,
     event_time      INTEGER NOT NULL,
@@ -24,16 +34,19 @@ CREATE TABLE IF NOT EXISTS device_logs (
     code            TEXT    NOT NULL DEFAULT '',
     value           TEXT    NOT NULL DEFAULT '',
     status          TEXT    NOT NULL DEFAULT '',
-    raw_json        TEXT    NOT NULL,
+    raw_json        BLOB    NOT NULL,  -- see encode_raw_json()
     collected_at    INTEGER NOT NULL,
-    UNIQUE(device_id, event_id, event_time)
+    -- Column order lets this dedup index also serve per-device time-range
+    -- scans, so no separate (device_id, event_time) index is maintained.
+    UNIQUE(device_id, event_time, event_id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_device_logs_device_time
-    ON device_logs(device_id, event_time);
-
-CREATE INDEX IF NOT EXISTS idx_device_logs_event_time
-    ON device_logs(event_time);
+-- Cross-device newest-first listing.  Keyed like the dedup index (time
+-- first) so query_logs' ORDER BY and keyset cursor are served without a
+-- sort; code is included so a code filter is checked in the index.
+CREATE INDEX IF NOT EXISTS idx_device_logs_time_key
+    ON device_logs(event_time, device_id, event_id, code);
+DROP INDEX IF EXISTS idx_device_logs_event_time;
 
 CREATE TABLE IF NOT EXISTS collection_bookmarks (
     device_id       TEXT PRIMARY KEY,
@@ -42,7 +55,7 @@ CREATE TABLE IF NOT EXISTS collection_bookmarks (
 );
 
 CREATE TABLE IF NOT EXISTS collection_runs (
-    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    id              INTEGER PRIMARY KEY,
     started_at      INTEGER NOT NULL,
     finished_at     INTEGER,
     devices_count   INTEGER NOT NULL DEFAULT 0,
@@ -51,8 +64,104 @@ CREATE TABLE IF NOT EXISTS collection_runs (
 );
 """
 
+# Applied once per connection.  WAL + synchronous=NORMAL trades the last
+# few commits on power loss (logs can be re-fetched) for far fewer fsyncs.
+# mmap lets reads of hot pages skip the pread() syscall and the copy into
+# the page cache; it is address space, not memory, until pages are touched.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA wal_autocheckpoint=1000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+)
+
+# sqlite3 keeps prepared statements per connection, keyed by SQL text, so
+# every method re-executes a statement that is already parsed and planned.
+# query_logs() builds one text per filter combination (48 in all, counting
+# COUNT and keyset variants); size the cache so none of them, plus the
+# fixed statements, is ever evicted and re-prepared.
+_CACHED_STATEMENTS = 256
+
+# How long get_stats() may reuse its counts before recounting.
+_STATS_TTL = 5.0
+
+# Dedup keys of the most recent rows written through one LogStorage.  The
+# collector re-fetches a one-second overlap every cycle and Pulsar
+# redelivers unacked messages, so repeats are almost always this recent.
+_RECENT_KEYS_MAX = 4096
+
+
+# raw_json is stored as raw deflate against a preset dictionary of the keys
+# and boilerplate shared by Tuya log entries and Pulsar payloads; a typical
+# 100-byte entry shrinks to about 30.  The leading byte names the format so
+# the dictionary can change without breaking existing rows.  The small
+# window and memLevel keep per-row compressor setup to a few microseconds.
+# Payloads are not deduplicated into a separate content-addressed table:
+# each one embeds its own event_id/event_time (or ts), so identical
+# payloads essentially never recur, while the shared structure is exactly
+# what the dictionary captures.
+_RAW_JSON_DEFLATE_V1 = b"\x01"
+_RAW_JSON_ZDICT = (
+    b'{"devId":"","productKey":"","bizCode":"offline","bizCode":"online",'
+    b'"data":{"dataId":"","devId":"","productKey":"","status":[{"code":"","t":17,'
+    b'"value":}]},"ts":17,"event_from":"1","event_id":,"event_time":17,'
+    b'"code":"","value":"","status":"1"}'
+)
+_RAW_JSON_WBITS = -9
+
+
+def encode_raw_json(text: str | bytes) -> bytes:
+    """Compress a raw JSON payload (text or UTF-8 bytes) for the ``raw_json`` column."""
+    if isinstance(text, str):
+        text = text.encode()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, _RAW_JSON_WBITS, 1, zdict=_RAW_JSON_ZDICT)
+    body = compressor.compress(text) + compressor.flush()
+    return _RAW_JSON_DEFLATE_V1 + body
+
+
+def decode_raw_json(value: str | bytes) -> str:
+    """Return the JSON text of a stored ``raw_json`` value.
+
+    Rows written before compression was introduced hold plain text and are
+    returned unchanged.
+    """
+    if isinstance(value, str):
+        return value
+    if value[:1] != _RAW_JSON_DEFLATE_V1:
+        raise ValueError(f"Unknown raw_json format byte {value[:1]!r}")
+    decompressor = zlib.decompressobj(_RAW_JSON_WBITS, zdict=_RAW_JSON_ZDICT)
+    return (decompressor.decompress(value[1:]) + decompressor.flush()).decode()
+
+
+_QUERY_FILTERS = ("device_id = ?", "event_time >= ?", "event_time <= ?", "code = ?")
+
+
+@lru_cache(maxsize=32)
+def _query_sql(
+    has_device: bool, has_start: bool, has_end: bool, has_code: bool, keyset: bool,
+) -> tuple[str, str]:
+    """Return ``(count_sql, select_sql)`` for one combination of filters.
+
+    There are only 32 combinations, so each text is built once; sqlite3's
+    statement cache then reuses the prepared statement for it.
+    """
+    flags = (has_device, has_start, has_end, has_code)
+    where = " AND ".join(f for f, used in zip(_QUERY_FILTERS, flags) if used) or "1=1"
+    count_sql = "SELECT COUNT(*) FROM device_logs WHERE " + where
+    if keyset:
+        where += " AND (event_time, device_id, event_id) < (?, ?, ?)"
+    select_sql = (
+        "SELECT " + ", ".join(LogStorage._LOG_COLUMNS)
+        + " FROM device_logs WHERE " + where
+        + " ORDER BY event_time DESC, device_id DESC, event_id DESC"
+        + " LIMIT ? OFFSET ?"
+    )
+    return count_sql, select_sql
 
-@dataclass
+
+@dataclass(slots=True)
 class LogRecord:
     """A single device log entry for storage."""
 
@@ -63,7 +172,8 @@ class LogRecord:
     code: str
     value: str
     status: str
-    raw_json: str
+    # JSON text; UTF-8 bytes straight from the encoder are accepted too.
+    raw_json: str | bytes
 
     @classmethod
     def from_api(cls, device_id: str, entry: dict) -> LogRecord:
@@ -76,26 +186,75 @@ class LogRecord:
             code=entry.get("code", ""),
             value=str(entry.get("value", "")),
             status=str(entry.get("status", "")),
-            raw_json=json.dumps(entry),
+            raw_json=dumps(entry),
         )
 
 
 class LogStorage:
     """Manages a SQLite database for Tuya device log persistence."""
 
-    def __init__(self, db_path: Path = DEFAULT_DB_PATH) -> None:
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, *, readers: int = 0) -> None:
+        """*readers* > 0 opens that many extra query-only connections so the
+        read methods can run in parallel from several threads (WAL lets
+        readers proceed alongside the writer).  Ignored for ``:memory:``,
+        where every connection would see its own empty database.
+        """
         self.db_path = db_path
+        self.readers = readers
         self._conn: sqlite3.Connection | None = None
+        self._tx_depth = 0
+        self._read_pool: queue.Queue[sqlite3.Connection] | None = None
+        self._read_lock = threading.Lock()
+        # get_stats() memo: (monotonic time, stats) and the distinct device
+        # ids seen so far (loaded lazily), plus the PRAGMA data_version each
+        # connection last reported, so commits elsewhere invalidate them.
+        self._stats_cache: tuple[float, dict[str, int]] | None = None
+        self._known_devices: set[str] | None = None
+        self._data_versions: dict[sqlite3.Connection, int] = {}
+        # query_logs() totals for the unfiltered (None) and device-only
+        # queries, invalidated together with the stats memo.
+        self._counts: dict[str | None, int] = {}
+        # (device_id, event_time, event_id) of recently written rows, oldest
+        # first; see _unseen().  Seeded from the newest stored rows on the
+        # first insert after open().
+        self._recent_keys: dict[tuple[Any, ...], None] = {}
+        self._recent_keys_loaded = False
 
     def open(self) -> None:
         """Open the database and ensure schema exists."""
-        self._conn = sqlite3.connect(str(self.db_path))
-        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn = self._connect()
         self._conn.executescript(_SCHEMA)
         self._conn.commit()
+        self._invalidate_stats()
+        self._data_versions.clear()
+        self._recent_keys.clear()
+        self._recent_keys_loaded = False
+
+        if self.readers > 0 and str(self.db_path) != ":memory:":
+            self._read_pool = queue.Queue()
+            for _ in range(self.readers):
+                reader = self._connect()
+                reader.execute("PRAGMA query_only=1")
+                self._read_pool.put(reader)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Callers such as the dashboard hop to worker threads for blocking
+        # queries; see _reader() for how reads are kept apart.
+        conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
     def close(self) -> None:
         """Close the database connection."""
+        if self._read_pool is not None:
+            while not self._read_pool.empty():
+                self._read_pool.get_nowait().close()
+            self._read_pool = None
         if self._conn:
             self._conn.close()
             self._conn = None
@@ -113,38 +272,197 @@ class LogStorage:
             raise RuntimeError("Database not opened")
         return self._conn
 
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for a read-only query.
+
+        Uses the pool when one was opened; otherwise the writer connection,
+        one thread at a time.
+        """
+        pool = self._read_pool
+        if pool is None:
+            with self._read_lock:
+                yield self.conn
+            return
+        conn = pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group several writes into a single ``BEGIN IMMEDIATE`` transaction.
+
+        Writes made inside the block are committed together on exit (one
+        fsync instead of one per call) and rolled back if it raises.
+        Nested blocks join the outermost transaction.
+        """
+        if self._tx_depth:
+            self._tx_depth += 1
+            try:
+                yield
+            finally:
+                self._tx_depth -= 1
+            return
+
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        self._tx_depth = 1
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            self._invalidate_stats()
+            self._recent_keys.clear()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._tx_depth = 0
+
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the main database file and truncate it.
+
+        Long-running writers call this between runs so the ``-wal`` file
+        does not keep growing while readers hold old snapshots.
+        """
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _commit(self) -> None:
+        """Commit unless an enclosing :meth:`transaction` will do it."""
+        if not self._tx_depth:
+            self.conn.commit()
+
     # -- Log insertion -------------------------------------------------------
 
+    # One SQL string for every insert path, so sqlite3's statement cache
+    # reuses a single prepared statement.  The conflict target limits the
+    # skip to dedup-key collisions; OR IGNORE would also silently drop rows
+    # that break NOT NULL.
+    _INSERT_SQL = """
+        INSERT INTO device_logs
+            (device_id, event_id, event_time, event_from,
+             code, value, status, raw_json, collected_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(device_id, event_time, event_id) DO NOTHING
+    """
+
     def insert_logs(self, records: list[LogRecord]) -> int:
         """Bulk insert log records, skipping duplicates. Returns new row count."""
         if not records:
             return 0
+        return self._insert_rows(self._record_rows(records, int(time.time() * 1000)))
+
+    def insert_logs_many(self, batches: Iterable[Iterable[LogRecord]]) -> int:
+        """Insert several batches of records in one transaction.
+
+        All rows share one ``collected_at`` timestamp and one commit (one
+        WAL sync) instead of one per batch.  Returns the new row count.
+        """
         now_ms = int(time.time() * 1000)
-        cursor = self.conn.executemany(
-            """
-            INSERT OR IGNORE INTO device_logs
-                (device_id, event_id, event_time, event_from,
-                 code, value, status, raw_json, collected_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            [
-                (
-                    r.device_id,
-                    r.event_id,
-                    r.event_time,
-                    r.event_from,
-                    r.code,
-                    r.value,
-                    r.status,
-                    r.raw_json,
-                    now_ms,
-                )
-                for r in records
-            ],
-        )
-        self.conn.commit()
+        with self.transaction():
+            return self._insert_rows(
+                row for records in batches for row in self._record_rows(records, now_ms)
+            )
+
+    def _record_rows(
+        self, records: Iterable[LogRecord], now_ms: int,
+    ) -> Iterator[tuple[Any, ...]]:
+        # Build the bound tuples directly; dataclasses.astuple() deep-copies
+        # and is several times slower.
+        unseen = self._recent_keys_filter()
+        for r in records:
+            if not unseen(r.device_id, r.event_time, r.event_id):
+                continue
+            yield (
+                r.device_id,
+                r.event_id,
+                r.event_time,
+                r.event_from,
+                r.code,
+                r.value,
+                r.status,
+                encode_raw_json(r.raw_json),
+                now_ms,
+            )
+
+    def _recent_keys_filter(self) -> Callable[[str, int, Any], bool]:
+        """Return :meth:`_unseen`, seeding the memory on the first insert.
+
+        The newest stored keys are loaded once, so a restarted writer also
+        skips replays of what it wrote before.  Read-only users never pay
+        for the query.
+        """
+        if not self._recent_keys_loaded:
+            self._recent_keys_loaded = True
+            newest = self.conn.execute(
+                "SELECT device_id, event_time, event_id FROM device_logs"
+                " ORDER BY event_time DESC, device_id DESC, event_id DESC LIMIT ?",
+                (_RECENT_KEYS_MAX,),
+            ).fetchall()
+            recent = self._recent_keys
+            # event_id has TEXT affinity, but writers pass the integer ids
+            # LogRecord declares; a key of the other type only costs a miss.
+            # Only text that an int is stored as maps back to that int:
+            # "0123" or non-ASCII digits are different rows from 123.
+            for device_id, event_time, event_id in reversed(newest):
+                if event_id.isascii() and event_id.lstrip("-").isdigit():
+                    as_int = int(event_id)
+                    if str(as_int) == event_id:
+                        event_id = as_int
+                recent[(device_id, event_time, event_id)] = None
+        return self._unseen
+
+    def _unseen(self, device_id: str, event_time: int, event_id: Any) -> bool:
+        """Return False for a row known to be stored recently, else record it.
+
+        Repeats are skipped before compressing the payload and probing the
+        UNIQUE index; anything older than the last :data:`_RECENT_KEYS_MAX`
+        rows still falls through to the ``ON CONFLICT`` clause.  The memory is exact
+        (a hit is a real duplicate), unlike a Bloom filter, whose maybe-present
+        answers would still need the index lookup.
+        """
+        key = (device_id, event_time, event_id)
+        recent = self._recent_keys
+        if key in recent:
+            return False
+        recent[key] = None
+        if len(recent) > _RECENT_KEYS_MAX:
+            del recent[next(iter(recent))]
+        return True
+
+    def _insert_rows(self, rows: Iterable[tuple[Any, ...]]) -> int:
+        known = self._known_devices
+        if known is not None:
+            rows = self._track_devices(rows, known)
+        try:
+            cursor = self.conn.executemany(self._INSERT_SQL, rows)
+        except BaseException:
+            # Rows before the failing one sit in the implicit transaction;
+            # outside transaction() nothing else would roll them back, and
+            # the next write would commit them.
+            if not self._tx_depth:
+                self.conn.rollback()
+                self._invalidate_stats()
+            # Keys remembered for this batch may not have been written.
+            self._recent_keys.clear()
+            raise
+        self._stats_cache = None
+        self._counts.clear()
+        self._commit()
         return cursor.rowcount
 
+    @staticmethod
+    def _track_devices(
+        rows: Iterable[tuple[Any, ...]], known: set[str],
+    ) -> Iterator[tuple[Any, ...]]:
+        # Every row's device ends up with at least one stored log, whether
+        # the row itself was new or ignored as a duplicate.
+        for row in rows:
+            known.add(row[0])
+            yield row
+
     # -- Bookmarks -----------------------------------------------------------
 
     def get_device_bookmark(self, device_id: str) -> int | None:
@@ -155,28 +473,35 @@ class LogStorage:
         ).fetchone()
         return row[0] if row else None
 
+    _BOOKMARK_SQL = """
+        INSERT INTO collection_bookmarks (device_id, last_event_time, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(device_id) DO UPDATE SET
+            last_event_time = excluded.last_event_time,
+            updated_at = excluded.updated_at
+    """
+
     def set_device_bookmark(self, device_id: str, last_event_time: int) -> None:
         """Upsert the bookmark for a device."""
+        self.set_device_bookmarks([(device_id, last_event_time)])
+
+    def set_device_bookmarks(self, bookmarks: Iterable[tuple[str, int]]) -> None:
+        """Upsert several ``(device_id, last_event_time)`` bookmarks at once."""
         now_ms = int(time.time() * 1000)
-        self.conn.execute(
-            """
-            INSERT INTO collection_bookmarks (device_id, last_event_time, updated_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(device_id) DO UPDATE SET
-                last_event_time = excluded.last_event_time,
-                updated_at = excluded.updated_at
-            """,
-            (device_id, last_event_time, now_ms),
+        self.conn.executemany(
+            self._BOOKMARK_SQL,
+            ((device_id, last_event_time, now_ms) for device_id, last_event_time in bookmarks),
         )
-        self.conn.commit()
+        self._commit()
 
     def get_all_bookmarks(self) -> list[tuple[str, int]]:
         """Return all (device_id, last_event_time) bookmark pairs."""
-        rows = self.conn.execute(
-            "SELECT device_id, last_event_time FROM collection_bookmarks "
-            "ORDER BY device_id"
-        ).fetchall()
-        return [(r[0], r[1]) for r in rows]
+        # fetchall() already yields the pairs as tuples; no copy needed.
+        with self._reader() as conn:
+            return conn.execute(
+                "SELECT device_id, last_event_time FROM collection_bookmarks "
+                "ORDER BY device_id"
+            ).fetchall()
 
     # -- Run tracking --------------------------------------------------------
 
@@ -187,7 +512,8 @@ class LogStorage:
             "INSERT INTO collection_runs (started_at) VALUES (?)",
             (now_ms,),
         )
-        self.conn.commit()
+        self._stats_cache = None
+        self._commit()
         return cursor.lastrowid  # type: ignore[return-value]
 
     def record_run_end(
@@ -208,7 +534,8 @@ class LogStorage:
             """,
             (now_ms, devices, logs, status, run_id),
         )
-        self.conn.commit()
+        self._stats_cache = None
+        self._commit()
 
     # -- Query helpers -------------------------------------------------------
 
@@ -224,24 +551,18 @@ class LogStorage:
         start_time: int | None = None,
         end_time: int | None = None,
         code: str | None = None,
-    ) -> tuple[str, list[Any]]:
-        """Build a WHERE clause and parameter list from optional filters."""
-        clauses: list[str] = []
-        params: list[Any] = []
-        if device_id:
-            clauses.append("device_id = ?")
-            params.append(device_id)
-        if start_time is not None:
-            clauses.append("event_time >= ?")
-            params.append(start_time)
-        if end_time is not None:
-            clauses.append("event_time <= ?")
-            params.append(end_time)
-        if code:
-            clauses.append("code = ?")
-            params.append(code)
-        where = " AND ".join(clauses) if clauses else "1=1"
-        return where, params
+    ) -> tuple[tuple[bool, bool, bool, bool], list[Any]]:
+        """Return which optional filters apply, and their parameters in order.
+
+        The flags select the SQL text from :func:`_query_sql`.
+        """
+        flags = (bool(device_id), start_time is not None, end_time is not None, bool(code))
+        params = [
+            value
+            for value, used in zip((device_id, start_time, end_time, code), flags)
+            if used
+        ]
+        return flags, params
 
     def query_logs(
         self,
@@ -252,62 +573,100 @@ class LogStorage:
         code: str | None = None,
         limit: int = 100,
         offset: int = 0,
+        before: tuple[int, str, str] | None = None,
     ) -> tuple[list[dict[str, Any]], int]:
-        """Query device_logs with optional filters.
+        """Query device_logs with optional filters, newest first.
+
+        Rows are ordered by ``(event_time, device_id, event_id)`` descending.
+        For deep pagination pass ``before`` as that triple from the last row
+        of the previous page instead of a growing ``offset``; the index then
+        seeks straight to the next page.  ``total_count`` ignores ``before``.
 
         Returns ``(rows_as_dicts, total_count)``.
         """
-        where, params = self._build_where(
+        flags, params = self._build_where(
             device_id=device_id,
             start_time=start_time,
             end_time=end_time,
             code=code,
         )
-
-        count_sql = "SELECT COUNT(*) FROM device_logs WHERE " + where
-        total: int = self.conn.execute(count_sql, params).fetchone()[0]
-
-        select_cols = ", ".join(self._LOG_COLUMNS)
-        select_sql = (
-            "SELECT " + select_cols
-            + " FROM device_logs WHERE " + where
-            + " ORDER BY event_time DESC LIMIT ? OFFSET ?"
-        )
-        rows = self.conn.execute(
-            select_sql, [*params, limit, offset],
-        ).fetchall()
-
-        return [dict(zip(self._LOG_COLUMNS, r)) for r in rows], total
+        count_sql, select_sql = _query_sql(*flags, before is not None)
+        page_params = [*params, *before, limit, offset] if before else [*params, limit, offset]
+        columns = self._LOG_COLUMNS
+        with self._reader() as conn:
+            if start_time is None and end_time is None and not code:
+                # Paging through the dashboard repeats the same COUNT; it
+                # only changes when rows are written here or elsewhere.
+                self._check_data_version(conn)
+                key = device_id or None
+                cached = self._counts.get(key)
+                if cached is None:
+                    cached = self._counts[key] = conn.execute(count_sql, params).fetchone()[0]
+                total = cached
+            else:
+                total = conn.execute(count_sql, params).fetchone()[0]
+            # Build the dicts straight off the cursor rather than via
+            # fetchall(): one pass, no intermediate list of tuples.
+            # (sqlite3.Row + dict() measures slower than zip for this.)
+            cursor = conn.execute(select_sql, page_params)
+            return [dict(zip(columns, r)) for r in cursor], total
+
+    _RUN_COLUMNS = (
+        "id", "started_at", "finished_at",
+        "devices_count", "logs_collected", "status",
+    )
 
     def get_runs(self, limit: int = 50) -> list[dict[str, Any]]:
         """Return recent collection runs."""
-        rows = self.conn.execute(
-            "SELECT id, started_at, finished_at, devices_count, "
-            "logs_collected, status FROM collection_runs "
-            "ORDER BY id DESC LIMIT ?",
-            (limit,),
-        ).fetchall()
-        columns = [
-            "id", "started_at", "finished_at",
-            "devices_count", "logs_collected", "status",
-        ]
-        return [dict(zip(columns, r)) for r in rows]
+        columns = self._RUN_COLUMNS
+        with self._reader() as conn:
+            cursor = conn.execute(
+                "SELECT " + ", ".join(columns) + " FROM collection_runs "
+                "ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+            return [dict(zip(columns, r)) for r in cursor]
 
     # -- Stats ---------------------------------------------------------------
 
     def get_stats(self) -> dict[str, int]:
-        """Return summary statistics about the database."""
-        total_logs = self.conn.execute(
-            "SELECT COUNT(*) FROM device_logs"
-        ).fetchone()[0]
-        total_devices = self.conn.execute(
-            "SELECT COUNT(DISTINCT device_id) FROM device_logs"
-        ).fetchone()[0]
-        total_runs = self.conn.execute(
-            "SELECT COUNT(*) FROM collection_runs"
-        ).fetchone()[0]
-        return {
-            "total_logs": total_logs,
-            "total_devices": total_devices,
-            "total_runs": total_runs,
-        }
+        """Return summary statistics about the database.
+
+        Results are reused for up to :data:`_STATS_TTL` seconds.  Writes
+        through this instance, and commits from any other connection (the
+        collector usually runs in a separate process), drop the cached
+        value immediately.
+        """
+        with self._reader() as conn:
+            self._check_data_version(conn)
+            now = time.monotonic()
+            cached = self._stats_cache
+            if cached is not None and now - cached[0] < _STATS_TTL:
+                return dict(cached[1])
+
+            known = self._known_devices
+            if known is None:
+                known = self._known_devices = {
+                    row[0] for row in conn.execute("SELECT DISTINCT device_id FROM device_logs")
+                }
+            stats = {
+                "total_logs": conn.execute("SELECT COUNT(*) FROM device_logs").fetchone()[0],
+                "total_devices": len(known),
+                "total_runs": conn.execute("SELECT COUNT(*) FROM collection_runs").fetchone()[0],
+            }
+        self._stats_cache = (now, stats)
+        return dict(stats)
+
+    def _check_data_version(self, conn: sqlite3.Connection) -> None:
+        # data_version only moves for commits made by *other* connections,
+        # and each connection counts separately; a change on whichever
+        # connection we borrowed means the memos may be old.
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._data_versions.get(conn) != version:
+            self._invalidate_stats()
+            self._data_versions[conn] = version
+
+    def _invalidate_stats(self) -> None:
+        self._stats_cache = None
+        self._known_devices = None
+        self._counts.clear()
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class TemplatesMixin:
     """Methods for browsing and applying pre-built scene templates."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class TimersMixin:
     """Methods for managing device timers (scheduled tasks)."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
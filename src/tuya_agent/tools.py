@@ -2,14 +2,22 @@
 
 Each tool is a standalone async function with a JSON-schema-style descriptor
 that agents can discover and invoke. The ``TOOLS`` list provides machine-
-readable definitions compatible with common agent frameworks.
+readable definitions compatible with common agent frameworks, and
+``TOOLS_JSON`` holds the same list pre-encoded as JSON bytes.
 """
 
 from __future__ import annotations
 
+import atexit
+from collections.abc import Awaitable, Callable
+from pathlib import Path
 from typing import Any
 
+from tuya_agent._json import dumps
 from tuya_agent.client import TuyaClient
+from tuya_agent.collector import CollectorConfig, LogCollector
+from tuya_agent.storage import LogStorage
+from tuya_agent.watcher import EventWatcher
 
 # ---------------------------------------------------------------------------
 # Tool registry
@@ -17,18 +25,61 @@ from tuya_agent.client import TuyaClient
 
 TOOLS: list[dict[str, Any]] = []
 
+# Tool name -> (implementation, required args, accepted args), for dispatch().
+# ``schema["function"]`` keeps only the name, for serialisable schemas.
+_TOOLS_BY_NAME: dict[
+    str, tuple[Callable[..., Awaitable[Any]], frozenset[str], frozenset[str]]
+] = {}
+
 
 def _register(schema: dict[str, Any]):
-    """Decorator that adds a tool schema to the TOOLS registry."""
+    """Decorator that adds a tool schema to the TOOLS registry.
+
+    Raises ``ValueError`` at import time if the tool name is already taken,
+    since dispatch() could only ever reach one of them.
+    """
 
     def decorator(fn):
+        if schema["name"] in _TOOLS_BY_NAME:
+            raise ValueError(f"Duplicate tool name: {schema['name']}")
         schema["function"] = fn.__name__
         TOOLS.append(schema)
+        params = schema["parameters"]
+        _TOOLS_BY_NAME[schema["name"]] = (
+            fn,
+            frozenset(params.get("required", ())),
+            frozenset(params.get("properties", ())),
+        )
         return fn
 
     return decorator
 
 
+# Open log databases by resolved path, shared by the storage-backed tools.
+_STORAGES: dict[str, LogStorage] = {}
+
+
+def _storage(db_path: str) -> LogStorage:
+    """Return the open LogStorage for *db_path*, opening it on first use.
+
+    Connections stay open for the life of the process instead of paying
+    connection setup and the schema check on every tool call.
+    """
+    key = str(Path(db_path).resolve())
+    storage = _STORAGES.get(key)
+    if storage is None:
+        storage = LogStorage(Path(db_path))
+        storage.open()
+        _STORAGES[key] = storage
+    return storage
+
+
+@atexit.register
+def _close_storages() -> None:
+    while _STORAGES:
+        _STORAGES.popitem()[1].close()
+
+
 # ---------------------------------------------------------------------------
 # Device tools
 # ---------------------------------------------------------------------------
@@ -64,6 +115,31 @@ async def list_devices(
     return await client.devices.list(page_size=page_size, last_row_key=last_row_key)
 
 
+@_register(
+    {
+        "name": "list_all_devices",
+        "description": (
+            "List every Tuya device in the cloud project in one call, "
+            "following pagination automatically."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "page_size": {
+                    "type": "integer",
+                    "description": "Number of devices fetched per request (default 100).",
+                },
+            },
+        },
+    }
+)
+async def list_all_devices(client: TuyaClient, page_size: int = 100) -> dict[str, Any]:
+    # The listing is cursor-paged, so pages cannot be fetched out of order;
+    # iter_devices requests each next page while the current one is consumed.
+    devices = [device async for device in client.devices.iter_devices(page_size=page_size)]
+    return {"list": devices, "total": len(devices)}
+
+
 @_register(
     {
         "name": "get_device",
@@ -538,15 +614,9 @@ async def collect_logs(
     db_path: str = "tuya_logs.db",
     lookback_days: int = 7,
 ) -> dict[str, Any]:
-    from pathlib import Path
-
-    from tuya_agent.collector import CollectorConfig, LogCollector
-    from tuya_agent.storage import LogStorage
-
     config = CollectorConfig(lookback_days=lookback_days)
-    with LogStorage(Path(db_path)) as storage:
-        collector = LogCollector(client, storage, config)
-        result = await collector.collect_all()
+    collector = LogCollector(client, _storage(db_path), config)
+    result = await collector.collect_all()
     return {
         "devices_found": result.devices_found,
         "devices_collected": result.devices_collected,
@@ -578,13 +648,9 @@ async def get_collection_status(
     client: TuyaClient,
     db_path: str = "tuya_logs.db",
 ) -> dict[str, Any]:
-    from pathlib import Path
-
-    from tuya_agent.storage import LogStorage
-
-    with LogStorage(Path(db_path)) as storage:
-        stats = storage.get_stats()
-        bookmarks = storage.get_all_bookmarks()
+    storage = _storage(db_path)
+    stats = storage.get_stats()
+    bookmarks = storage.get_all_bookmarks()
     stats["bookmarks"] = {did: ts for did, ts in bookmarks}
     return stats
 
@@ -643,19 +709,14 @@ async def query_logs(
     limit: int = 100,
     offset: int = 0,
 ) -> dict[str, Any]:
-    from pathlib import Path
-
-    from tuya_agent.storage import LogStorage
-
-    with LogStorage(Path(db_path)) as storage:
-        rows, total = storage.query_logs(
-            device_id=device_id,
-            start_time=start_time,
-            end_time=end_time,
-            code=code,
-            limit=limit,
-            offset=offset,
-        )
+    rows, total = _storage(db_path).query_logs(
+        device_id=device_id,
+        start_time=start_time,
+        end_time=end_time,
+        code=code,
+        limit=limit,
+        offset=offset,
+    )
     return {"logs": rows, "total": total}
 
 
@@ -688,12 +749,7 @@ async def get_collection_runs(
     db_path: str = "tuya_logs.db",
     limit: int = 50,
 ) -> list[dict[str, Any]]:
-    from pathlib import Path
-
-    from tuya_agent.storage import LogStorage
-
-    with LogStorage(Path(db_path)) as storage:
-        return storage.get_runs(limit=limit)
+    return _storage(db_path).get_runs(limit=limit)
 
 
 # ---------------------------------------------------------------------------
@@ -763,16 +819,10 @@ async def watch_realtime_events(
     db_path: str = "tuya_logs.db",
     duration_seconds: float = 60,
 ) -> dict[str, Any]:
-    from pathlib import Path
-
-    from tuya_agent.storage import LogStorage
-    from tuya_agent.watcher import EventWatcher
-
-    with LogStorage(Path(db_path)) as storage:
-        watcher = EventWatcher(client, storage)
-        summaries = await watcher.run_with_callback(
-            duration=duration_seconds,
-        )
+    watcher = EventWatcher(client, _storage(db_path))
+    summaries = await watcher.run_with_callback(
+        duration=duration_seconds,
+    )
     return {
         "events_stored": watcher.count,
         "duration_seconds": duration_seconds,
@@ -1349,6 +1399,11 @@ async def send_notification(
     )
 
 
+# The schemas are fixed once the module has loaded, so encode them once for
+# discovery endpoints instead of per request.
+TOOLS_JSON: bytes = dumps(TOOLS)
+
+
 # ---------------------------------------------------------------------------
 # Dispatcher
 # ---------------------------------------------------------------------------
@@ -1360,9 +1415,15 @@ async def dispatch(
     """Look up a tool by name and call it with the given arguments.
 
     This is the primary entry point for agent frameworks to invoke tools.
+    Raises ``ValueError`` for an unknown tool, a missing required argument,
+    or an argument the tool's schema does not declare.
     """
-    for tool in TOOLS:
-        if tool["name"] == tool_name:
-            fn = globals()[tool["function"]]
-            return await fn(client, **arguments)
-    raise ValueError(f"Unknown tool: {tool_name}")
+    entry = _TOOLS_BY_NAME.get(tool_name)
+    if entry is None:
+        raise ValueError(f"Unknown tool: {tool_name}")
+    fn, required, accepted = entry
+    if missing := required - arguments.keys():
+        raise ValueError(f"Tool {tool_name} missing arguments: {', '.join(sorted(missing))}")
+    if unknown := arguments.keys() - accepted:
+        raise ValueError(f"Tool {tool_name} got unknown arguments: {', '.join(sorted(unknown))}")
+    return await fn(client, **arguments)
@@ -6,17 +6,22 @@ import asyncio
 import hashlib
 import json
 import logging
+from collections import OrderedDict
 from collections.abc import Callable
 from typing import Any
 
 import websockets
 
+from tuya_agent._json import dumps
 from tuya_agent.client import TuyaClient
 from tuya_agent.events import TuyaEvent
 from tuya_agent.storage import LogRecord, LogStorage
 
 logger = logging.getLogger(__name__)
 
+# How many recent events the watcher remembers to recognise repeats cheaply.
+_RECENT_EVENTS_MAX = 4096
+
 
 def event_to_record(event: TuyaEvent) -> LogRecord:
     """Convert a real-time TuyaEvent into a LogRecord for storage.
@@ -25,12 +30,20 @@ def event_to_record(event: TuyaEvent) -> LogRecord:
     identifying fields so that duplicate deliveries are deduplicated by
     the storage layer's UNIQUE constraint.
     """
-    # Build a deterministic event_id from the event content.
-    id_payload = (
-        f"{event.device_id}:{event.timestamp}:"
-        f"{event.event_type}:{json.dumps(event.data, sort_keys=True)}"
+    # The canonical data JSON is both hashed and stored as ``value``.  It
+    # stays on the stdlib encoder even when orjson is installed: the id must
+    # not depend on which JSON backend a process happens to have.
+    canonical = json.dumps(event.data, sort_keys=True, separators=(",", ":"))
+
+    # Build a deterministic event_id from the event content.  A 64-bit
+    # BLAKE2b digest is plenty for a dedup key and cheaper than SHA-256;
+    # dropping the top bit keeps it a positive signed 64-bit integer.
+    id_hash = hashlib.blake2b(
+        f"{event.device_id}:{event.timestamp}:{event.event_type}:".encode(),
+        digest_size=8,
     )
-    event_id = int(hashlib.sha256(id_payload.encode()).hexdigest()[:15], 16)
+    id_hash.update(canonical.encode())
+    event_id = int.from_bytes(id_hash.digest(), "big") >> 1
 
     return LogRecord(
         device_id=event.device_id,
@@ -38,19 +51,39 @@ def event_to_record(event: TuyaEvent) -> LogRecord:
         event_time=event.timestamp,
         event_from="ws",
         code=event.event_type,
-        value=json.dumps(event.data, sort_keys=True),
+        value=canonical,
         status="ws",
-        raw_json=json.dumps(event.raw),
+        raw_json=event.raw_json if event.raw_json is not None else dumps(event.raw),
     )
 
 
 class EventWatcher:
-    """Streams real-time device events into SQLite storage."""
+    """Streams real-time device events into SQLite storage.
+
+    Events are written in batches: every ``batch_size`` events or every
+    ``flush_interval`` seconds, whichever comes first, the buffered events
+    and their devices' bookmarks are stored in one transaction.
+    """
 
-    def __init__(self, client: TuyaClient, storage: LogStorage) -> None:
+    def __init__(
+        self,
+        client: TuyaClient,
+        storage: LogStorage,
+        *,
+        batch_size: int = 64,
+        flush_interval: float = 0.25,
+    ) -> None:
         self._client = client
         self._storage = storage
         self._count = 0
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        # ``None`` in place of a record marks a repeat that is not written.
+        self._pending: list[tuple[TuyaEvent, LogRecord | None]] = []
+        # (device_id, timestamp, event_type) -> data of recently seen events.
+        self._recent: OrderedDict[tuple[str, int, str], Any] = OrderedDict()
+        # Bookmark last written per device, so flushes only write advances.
+        self._bookmarks: dict[str, int] = {}
 
     @property
     def count(self) -> int:
@@ -78,21 +111,26 @@ class EventWatcher:
         Useful for the agent tool interface where a list of events
         is returned after a fixed duration.
         """
-        summaries: list[dict[str, Any]] = []
+        # Keep (event, stored) pairs while streaming; the dicts are only
+        # built once the run is over.
+        received: list[tuple[TuyaEvent, bool]] = []
 
         def _on_event(event: TuyaEvent, stored: bool) -> None:
-            summaries.append({
+            received.append((event, stored))
+            if callback:
+                callback(event, stored)
+
+        await self._run_loop(duration=duration, on_event=_on_event)
+        return [
+            {
                 "device_id": event.device_id,
                 "event_type": event.event_type,
                 "data": event.data,
                 "timestamp": event.timestamp,
                 "stored": stored,
-            })
-            if callback:
-                callback(event, stored)
-
-        await self._run_loop(duration=duration, on_event=_on_event)
-        return summaries
+            }
+            for event, stored in received
+        ]
 
     # -- internal ------------------------------------------------------------
 
@@ -106,27 +144,25 @@ class EventWatcher:
 
         If *duration* is set, stops after that many seconds.
         If *on_event* is provided, calls it with ``(event, stored)``
-        for each received event.
+        for each received event, once its batch has been written.
         """
 
+        async def _flush_periodically() -> None:
+            while True:
+                await asyncio.sleep(self._flush_interval)
+                self._flush(on_event)
+
         async def _stream() -> None:
             logger.info("Connecting to Tuya Pulsar WebSocket...")
+            flusher = asyncio.create_task(_flush_periodically())
             try:
-                async for event in self._client.events.subscribe():
-                    record = event_to_record(event)
-                    inserted = self._storage.insert_logs([record])
-                    stored = bool(inserted)
-
-                    if stored:
-                        self._count += 1
-                        self._storage.set_device_bookmark(
-                            event.device_id, event.timestamp,
-                        )
-
-                    if on_event:
-                        on_event(event, stored)
-
-                    _log_event(event, new=stored)
+                async for event in self._client.events.subscribe(keep_raw=True):
+                    if flusher.done():
+                        flusher.result()  # re-raise a failed background flush
+                    record = None if self._is_repeat(event) else event_to_record(event)
+                    self._pending.append((event, record))
+                    if len(self._pending) >= self._batch_size:
+                        self._flush(on_event)
             except websockets.exceptions.InvalidStatus as exc:
                 if exc.response.status_code == 401:
                     logger.error(
@@ -136,6 +172,13 @@ class EventWatcher:
                         "are active."
                     )
                 raise
+            finally:
+                flusher.cancel()
+                # Also runs when the duration timeout cancels us; the
+                # write is synchronous, so nothing buffered is lost.
+                self._flush(on_event)
+                if flusher.done() and not flusher.cancelled():
+                    flusher.result()  # a background flush failed while idle
 
         if duration is not None:
             try:
@@ -145,9 +188,63 @@ class EventWatcher:
         else:
             await _stream()
 
+    def _is_repeat(self, event: TuyaEvent) -> bool:
+        """Whether *event* matches one seen recently, remembering it if not.
+
+        Comparing the data dicts is much cheaper than ``event_to_record``'s
+        serialisation and hashing, and a match would hash to the same id.
+        """
+        key = (event.device_id, event.timestamp, event.event_type)
+        recent = self._recent
+        if key in recent and recent[key] == event.data:
+            recent.move_to_end(key)
+            return True
+        recent[key] = event.data
+        recent.move_to_end(key)
+        if len(recent) > _RECENT_EVENTS_MAX:
+            recent.popitem(last=False)
+        return False
+
+    def _flush(self, on_event: Callable[[TuyaEvent, bool], Any] | None) -> None:
+        """Store the buffered events and bookmarks in one transaction."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        storage = self._storage
+        stored_flags: list[bool] = []
+        written = self._bookmarks
+        bookmarks: dict[str, int] = {}
+        try:
+            with storage.transaction():
+                for event, record in pending:
+                    # One row per call, so each event learns whether it was
+                    # new; the transaction still makes it a single commit.
+                    stored = record is not None and bool(storage.insert_logs([record]))
+                    stored_flags.append(stored)
+                    if stored and event.timestamp > bookmarks.get(
+                        event.device_id, written.get(event.device_id, -1)
+                    ):
+                        bookmarks[event.device_id] = event.timestamp
+                if bookmarks:
+                    storage.set_device_bookmarks(bookmarks.items())
+        except BaseException:
+            # The transaction rolled back; keep the batch for the next flush.
+            self._pending[:0] = pending
+            raise
+        written.update(bookmarks)
+
+        for (event, _), stored in zip(pending, stored_flags):
+            if stored:
+                self._count += 1
+            if on_event:
+                on_event(event, stored)
+            _log_event(event, new=stored)
+
 
 def _log_event(event: TuyaEvent, *, new: bool) -> None:
     """Log a single event to the console."""
+    if not logger.isEnabledFor(logging.INFO):
+        return  # skip building the preview when it would be discarded
     tag = "NEW" if new else "DUP"
     data_preview = json.dumps(event.data)
     if len(data_preview) > 80:
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class WeatherMixin:
     """Methods for querying weather data from the Tuya Weather Service."""
 
+    __slots__ = ("_client",)
+
     def __init__(self, client: TuyaClient) -> None:
         self._client = client
 
@@ -1,6 +1,9 @@
 """Tests for the auth module (signing logic)."""
 
-from tuya_agent.auth import TokenInfo, sign_request
+import hashlib
+import hmac
+
+from tuya_agent.auth import TokenInfo, make_signer, sign_request
 from tuya_agent.config import TuyaConfig
 
 
@@ -45,6 +48,39 @@ class TestSignRequest:
         h2 = sign_request(cfg, "POST", "/v1.0/devices", body='{"a":1}', t=5000, nonce="n")
         assert h1["sign"] != h2["sign"]
 
+    def test_default_nonce_is_random_hex(self):
+        cfg = _config()
+        n1 = sign_request(cfg, "GET", "/v1.0/devices", t=5000)["nonce"]
+        n2 = sign_request(cfg, "GET", "/v1.0/devices", t=5000)["nonce"]
+        assert len(n1) == 32
+        int(n1, 16)  # valid hex
+        assert n1 != n2
+
+    def test_sign_matches_reference_hmac(self):
+        cfg = _config()
+        body = '{"a":1}'
+        headers = sign_request(
+            cfg, "POST", "/v1.0/devices", body=body,
+            access_token="tok", t=5000, nonce="n",
+        )
+        string_to_sign = (
+            "POST\n" + hashlib.sha256(body.encode()).hexdigest() + "\n\n/v1.0/devices"
+        )
+        expected = hmac.new(
+            b"test_secret",
+            ("test_id" + "tok" + "5000" + "n" + string_to_sign).encode(),
+            hashlib.sha256,
+        ).hexdigest().upper()
+        assert headers["sign"] == expected
+
+    def test_make_signer_matches_sign_request(self):
+        cfg = _config()
+        sign = make_signer(cfg)
+        for kwargs in ({}, {"body": b'{"a":1}', "access_token": "tok"}):
+            assert sign("POST", "/v1.0/devices", t=5000, nonce="n", **kwargs) == (
+                sign_request(cfg, "POST", "/v1.0/devices", t=5000, nonce="n", **kwargs)
+            )
+
 
 class TestTokenInfo:
     def test_not_expired_when_fresh(self):
@@ -1,11 +1,15 @@
 """Tests for the TuyaClient request signing and token flow."""
 
+import asyncio
 import json
+import sys
 
+import httpx
 import pytest
 import pytest_httpx
 
-from tuya_agent.client import TuyaAPIError, TuyaClient
+from tuya_agent.auth import sign_request
+from tuya_agent.client import TuyaAPIError, TuyaClient, iter_pages, run
 from tuya_agent.config import TuyaConfig
 
 
@@ -13,19 +17,42 @@ def _config() -> TuyaConfig:
     return TuyaConfig(access_id="test_id", access_secret="test_secret", api_region="us")
 
 
-def _token_response(access_token: str = "tok_abc", refresh_token: str = "ref_xyz"):
+def _token_response(
+    access_token: str = "tok_abc",
+    refresh_token: str = "ref_xyz",
+    expire_time: int = 7200,
+):
     return {
         "success": True,
         "result": {
             "access_token": access_token,
             "refresh_token": refresh_token,
-            "expire_time": 7200,
+            "expire_time": expire_time,
             "uid": "u123",
         },
     }
 
 
 class TestTuyaClient:
+    def test_clients_share_one_ssl_context(self, monkeypatch: pytest.MonkeyPatch):
+        from tuya_agent import client as client_module
+
+        created = []
+        real_create = httpx.create_ssl_context
+
+        def counting_create():
+            created.append(1)
+            return real_create()
+
+        monkeypatch.setattr(httpx, "create_ssl_context", counting_create)
+        client_module._ssl_context.cache_clear()
+        try:
+            TuyaClient(config=_config())
+            TuyaClient(config=_config())
+        finally:
+            client_module._ssl_context.cache_clear()
+        assert len(created) == 1
+
     @pytest.mark.asyncio
     async def test_fetch_token(self, httpx_mock: pytest_httpx.HTTPXMock):
         httpx_mock.add_response(json=_token_response())
@@ -36,6 +63,63 @@ class TestTuyaClient:
         assert client._token.refresh_token == "ref_xyz"
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_concurrent_ensure_token_fetches_once(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        client = TuyaClient(config=_config())
+        tokens = await asyncio.gather(*(client.ensure_token() for _ in range(5)))
+        assert tokens == ["tok_abc"] * 5
+        assert len(httpx_mock.get_requests()) == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_renews_token_in_background(
+        self, httpx_mock: pytest_httpx.HTTPXMock, monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr("tuya_agent.client._MIN_RENEW_DELAY", 0)
+        # The first token is already inside the renewal margin.
+        httpx_mock.add_response(json=_token_response("tok_old", expire_time=600))
+        httpx_mock.add_response(json=_token_response("tok_new"))
+        async with TuyaClient(config=_config()) as client:
+            for _ in range(20):
+                if client._token.access_token == "tok_new":
+                    break
+                await asyncio.sleep(0.01)
+            assert client._token.access_token == "tok_new"
+            assert await client.ensure_token() == "tok_new"
+        assert client._renew_task is None
+
+    @pytest.mark.asyncio
+    async def test_background_renewal_survives_non_json_response(
+        self, httpx_mock: pytest_httpx.HTTPXMock, monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr("tuya_agent.client._MIN_RENEW_DELAY", 0)
+        httpx_mock.add_response(json=_token_response("tok_old", expire_time=600))
+        httpx_mock.add_response(status_code=502, text="<html>Bad Gateway</html>")
+        httpx_mock.add_response(json=_token_response("tok_new"))
+        async with TuyaClient(config=_config()) as client:
+            for _ in range(20):
+                if client._token.access_token == "tok_new":
+                    break
+                await asyncio.sleep(0.01)
+            assert client._token.access_token == "tok_new"
+            assert not client._renew_task.done()
+
+    @pytest.mark.asyncio
+    async def test_close_after_renewal_task_failed(self):
+        client = TuyaClient(config=_config())
+
+        async def _failed() -> None:
+            raise KeyError("access_token")
+
+        client._renew_task = asyncio.create_task(_failed())
+        await asyncio.sleep(0)
+        await client.close()
+        assert client._renew_task is None
+        assert client._http.is_closed
+
     @pytest.mark.asyncio
     async def test_request_raises_on_api_error(self, httpx_mock: pytest_httpx.HTTPXMock):
         httpx_mock.add_response(json=_token_response())
@@ -63,6 +147,30 @@ class TestTuyaClient:
         assert result == [{"code": "switch", "value": True}]
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_in_flight_requests_bounded(self, httpx_mock: pytest_httpx.HTTPXMock):
+        in_flight = peak = 0
+
+        async def slow_status(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"success": True, "result": []})
+
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_callback(slow_status, is_reusable=True)
+        config = _config()
+        config.max_concurrency = 2
+        client = TuyaClient(config=config)
+        await client._fetch_token()
+        await asyncio.gather(*(
+            client.request("GET", f"/v1.0/iot-03/devices/dev{i}/status") for i in range(6)
+        ))
+        assert peak == 2
+        await client.close()
+
     @pytest.mark.asyncio
     async def test_request_sends_body_for_post(self, httpx_mock: pytest_httpx.HTTPXMock):
         httpx_mock.add_response(json=_token_response())
@@ -79,3 +187,211 @@ class TestTuyaClient:
         body = json.loads(request.content)
         assert body["commands"][0]["code"] == "switch"
         await client.close()
+
+    @pytest.mark.asyncio
+    async def test_request_signs_exact_body_bytes(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": True})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        await client.request("POST", "/v1.0/devices/dev1/commands", body={"a": 1})
+        request = httpx_mock.get_requests()[-1]
+        assert request.content == b'{"a":1}'
+        expected = sign_request(
+            _config(), "POST", "/v1.0/devices/dev1/commands",
+            body=request.content, access_token="tok_abc",
+            t=int(request.headers["t"]), nonce=request.headers["nonce"],
+        )
+        assert request.headers["sign"] == expected["sign"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_request_drops_none_params(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        await client.request(
+            "GET", "/v1.0/devices", params={"b": "2", "a": "1", "c": None},
+        )
+        request = httpx_mock.get_requests()[-1]
+        assert request.url.query == b"a=1&b=2"
+        expected = sign_request(
+            _config(), "GET", "/v1.0/devices?a=1&b=2", access_token="tok_abc",
+            t=int(request.headers["t"]), nonce=request.headers["nonce"],
+        )
+        assert request.headers["sign"] == expected["sign"]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_request_decodes_large_response(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        logs = [{"event_id": i, "value": "x" * 100} for i in range(500)]
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {"logs": logs}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        result = await client.request("GET", "/v1.0/devices/dev1/logs")
+        assert result["logs"] == logs
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_cached_request_shares_one_round_trip(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {"functions": []}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        results = await asyncio.gather(*(
+            client.request("GET", "/v1.0/devices/dev1/functions", cache_ttl=60)
+            for _ in range(3)
+        ))
+        again = await client.request("GET", "/v1.0/devices/dev1/functions", cache_ttl=60)
+        assert results == [{"functions": []}] * 3
+        assert again == {"functions": []}
+        assert len(httpx_mock.get_requests()) == 2  # token + one API call
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_ttl_zero_bypasses_cache(self, httpx_mock: pytest_httpx.HTTPXMock):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {"v": 1}})
+        httpx_mock.add_response(json={"success": True, "result": {"v": 2}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        first = await client.devices.get_functions("dev1")
+        assert await client.devices.get_functions("dev1") == first
+        assert await client.devices.get_functions("dev1", cache_ttl=0) == {"v": 2}
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_send_commands_invalidates_cached_device(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {"online": False}})
+        httpx_mock.add_response(json={"success": True, "result": True})
+        httpx_mock.add_response(json={"success": True, "result": {"online": True}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        assert await client.devices.get("dev1") == {"online": False}
+        assert await client.devices.get("dev1") == {"online": False}
+        await client.devices.send_commands("dev1", [{"code": "switch", "value": True}])
+        assert await client.devices.get("dev1") == {"online": True}
+        assert len(httpx_mock.get_requests()) == 4
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_rule_changes_invalidate_cached_rules(
+        self, httpx_mock: pytest_httpx.HTTPXMock,
+    ):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": True, "result": {"list": [{"enabled": False}]}})
+        httpx_mock.add_response(json={"success": True, "result": True})
+        httpx_mock.add_response(json={"success": True, "result": {"list": [{"enabled": True}]}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        before = {"list": [{"enabled": False}]}
+        assert await client.scenes.list_rules("space1") == before
+        assert await client.scenes.list_rules("space1") == before
+        await client.scenes.enable_automation("home1", "auto1")
+        assert await client.scenes.list_rules("space1") == {"list": [{"enabled": True}]}
+        assert len(httpx_mock.get_requests()) == 4
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_request_is_not_cached(self, httpx_mock: pytest_httpx.HTTPXMock):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={"success": False, "code": 1010, "msg": "token invalid"})
+        httpx_mock.add_response(json={"success": True, "result": {"v": 1}})
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        with pytest.raises(TuyaAPIError):
+            await client.request("GET", "/v1.0/devices/dev1/functions", cache_ttl=60)
+        result = await client.request("GET", "/v1.0/devices/dev1/functions", cache_ttl=60)
+        assert result == {"v": 1}
+        await client.close()
+
+
+class TestIterPages:
+    @pytest.mark.asyncio
+    async def test_prefetches_next_page_before_yielding(self):
+        pages = {
+            None: {"list": [1, 2], "last_row_key": "k1"},
+            "k1": {"list": [3], "last_row_key": "k2"},
+            "k2": {"list": [], "last_row_key": ""},
+        }
+        requested: list[str | None] = []
+
+        async def fetch(cursor):
+            requested.append(cursor)
+            return pages[cursor]
+
+        seen = []
+        async for item in iter_pages(fetch, "list", "last_row_key"):
+            await asyncio.sleep(0)
+            if item == 1:
+                assert requested == [None, "k1"]
+            seen.append(item)
+        assert seen == [1, 2, 3]
+        assert requested == [None, "k1", "k2"]
+
+    @pytest.mark.asyncio
+    async def test_stops_on_repeated_cursor_or_more_flag(self):
+        async def looping(cursor):
+            return {"logs": [cursor], "next_row_key": "same", "has_next": True}
+
+        assert [x async for x in iter_pages(looping, "logs", "next_row_key")] == [None, "same"]
+
+        async def last_page(cursor):
+            return {"logs": ["a"], "next_row_key": "k", "has_next": False}
+
+        items = [x async for x in iter_pages(last_page, "logs", "next_row_key", "has_next")]
+        assert items == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_plain_list_is_single_page(self):
+        async def fetch(cursor):
+            assert cursor is None
+            return [{"id": "dev1"}]
+
+        assert [d async for d in iter_pages(fetch, "list", "last_row_key")] == [{"id": "dev1"}]
+
+    @pytest.mark.asyncio
+    async def test_iter_devices(self, httpx_mock: pytest_httpx.HTTPXMock):
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(json={
+            "success": True,
+            "result": {"list": [{"id": "dev1"}], "last_row_key": "k1"},
+        })
+        httpx_mock.add_response(json={
+            "success": True,
+            "result": {"list": [{"id": "dev2"}], "last_row_key": ""},
+        })
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        ids = [d["id"] async for d in client.devices.iter_devices()]
+        assert ids == ["dev1", "dev2"]
+        assert httpx_mock.get_requests()[-1].url.params["last_row_key"] == "k1"
+        await client.close()
+
+
+async def _loop_module() -> str:
+    return type(asyncio.get_running_loop()).__module__
+
+
+class TestRun:
+    def test_falls_back_to_asyncio(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setitem(sys.modules, "uvloop", None)
+        assert run(_loop_module()).startswith("asyncio")
+
+    def test_uses_uvloop_when_installed(self):
+        pytest.importorskip("uvloop")
+        assert run(_loop_module()).startswith("uvloop")
+        assert asyncio.run(_loop_module()).startswith("asyncio")
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
 from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from tuya_agent.client import TuyaClient
-from tuya_agent.collector import CollectorConfig, LogCollector
+from tuya_agent.collector import CollectionResult, CollectorConfig, LogCollector
 from tuya_agent.config import TuyaConfig
 from tuya_agent.storage import LogStorage
 
@@ -60,6 +63,15 @@ def _logs_response(
     }
 
 
+class TestCollectorConfig:
+    def test_event_types_are_normalised(self) -> None:
+        config = CollectorConfig(event_types=" 1, 2,,2 ,7 ")
+        assert config.event_types == "1,2,7"
+
+    def test_default_event_types_unchanged(self) -> None:
+        assert CollectorConfig().event_types == "1,2,3,4,5,6,7,8,9,10"
+
+
 class TestLogCollector:
     @pytest.mark.asyncio
     async def test_discover_devices(self, httpx_mock) -> None:
@@ -155,6 +167,34 @@ class TestLogCollector:
             assert result.logs_collected == 2
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_pagination_stops_at_page_cap(
+        self, httpx_mock, monkeypatch,
+    ) -> None:
+        """Prefetching must not request pages beyond the per-device cap."""
+        monkeypatch.setattr("tuya_agent.collector.MAX_PAGES_PER_DEVICE", 2)
+        httpx_mock.add_response(json=_token_response())
+        for i in range(2):
+            httpx_mock.add_response(
+                json=_logs_response(
+                    [{"event_id": i, "event_time": 1700000000000 + i,
+                      "event_from": "1", "status": "1"}],
+                    has_next=True,
+                    next_row_key=f"key{i}",
+                ),
+            )
+
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        with LogStorage(Path(":memory:")) as storage:
+            collector = LogCollector(
+                client, storage, CollectorConfig(request_delay=0),
+            )
+            records, max_time = await collector.collect_device_logs("dev1", 0, 1)
+            assert [r.event_id for r in records] == [0, 1]
+            assert max_time == 1700000000001
+        await client.close()
+
     @pytest.mark.asyncio
     async def test_incremental_uses_bookmark(self, httpx_mock) -> None:
         """Second run should start from the bookmark."""
@@ -203,3 +243,71 @@ class TestLogCollector:
             assert result.devices_collected == 1
             assert not result.errors
         await client.close()
+
+    @pytest.mark.asyncio
+    async def test_collect_all_devices_concurrently(self, httpx_mock) -> None:
+        """A failing device must not prevent others from being collected."""
+        httpx_mock.add_response(json=_token_response())
+        httpx_mock.add_response(
+            json=_device_list_response([
+                {"id": "dev1", "name": "Light"},
+                {"id": "dev2", "name": "Plug"},
+            ]),
+        )
+        httpx_mock.add_response(
+            url=re.compile(r".*/v1\.0/devices/dev1/logs.*"),
+            json=_logs_response([
+                {"event_id": 1, "event_time": 1700000000000,
+                 "event_from": "1", "status": "1"},
+            ]),
+        )
+        httpx_mock.add_response(
+            url=re.compile(r".*/v1\.0/devices/dev2/logs.*"),
+            json={"success": False, "code": 1106, "msg": "permission deny"},
+        )
+
+        client = TuyaClient(config=_config())
+        await client._fetch_token()
+        with LogStorage(Path(":memory:")) as storage:
+            collector = LogCollector(
+                client, storage,
+                CollectorConfig(request_delay=0, max_concurrency=2),
+            )
+            result = await collector.collect_all()
+            assert result.devices_found == 2
+            assert result.devices_collected == 1
+            assert result.devices_failed == 1
+            assert result.logs_collected == 1
+            assert len(result.errors) == 1
+            assert "dev2" in result.errors[0]
+            assert storage.get_device_bookmark("dev1") == 1700000000000
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_run_daemon_returns_after_stop(self) -> None:
+        collector = LogCollector(
+            MagicMock(), MagicMock(), CollectorConfig(poll_interval=3600),
+        )
+        runs = 0
+
+        async def _collect_all() -> CollectionResult:
+            nonlocal runs
+            runs += 1
+            return CollectionResult()
+
+        collector.collect_all = _collect_all  # type: ignore[method-assign]
+        task = asyncio.create_task(collector.run_daemon())
+        await asyncio.sleep(0.01)
+        collector.stop()
+        await asyncio.wait_for(task, timeout=1)
+        assert runs == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_before_run_daemon_is_kept(self) -> None:
+        collector = LogCollector(
+            MagicMock(), MagicMock(), CollectorConfig(poll_interval=3600),
+        )
+        collector.collect_all = AsyncMock()  # type: ignore[method-assign]
+        collector.stop()
+        await asyncio.wait_for(collector.run_daemon(), timeout=1)
+        collector.collect_all.assert_not_called()
@@ -6,15 +6,18 @@ from tuya_agent.config import TuyaConfig
 
 
 class TestTuyaConfig:
-    def test_base_url_for_valid_regions(self):
-        for region, expected_host in [
+    @pytest.mark.parametrize(
+        ("region", "expected_host"),
+        [
             ("us", "tuyaus.com"),
             ("eu", "tuyaeu.com"),
             ("cn", "tuyacn.com"),
             ("in", "tuyain.com"),
-        ]:
-            cfg = TuyaConfig(access_id="id", access_secret="sec", api_region=region)
-            assert expected_host in cfg.base_url
+        ],
+    )
+    def test_base_url_for_valid_regions(self, region, expected_host):
+        cfg = TuyaConfig(access_id="id", access_secret="sec", api_region=region)
+        assert expected_host in cfg.base_url
 
     def test_base_url_raises_for_invalid_region(self):
         cfg = TuyaConfig(access_id="id", access_secret="sec", api_region="mars")
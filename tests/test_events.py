@@ -0,0 +1,407 @@
+"""Tests for the Pulsar event stream."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from Crypto.Cipher import AES
+
+from tuya_agent.config import TuyaConfig
+from tuya_agent.events import (
+    EventsMixin,
+    TuyaEvent,
+    _ack_frame,
+    _AckBatcher,
+    _CallbackWorker,
+    _decode_payload,
+    _reconnect_delay,
+    _split_envelope,
+    _ws_password,
+)
+
+SECRET = "0123456789abcdef0123456789abcdef"
+
+
+def _client() -> MagicMock:
+    client = MagicMock()
+    client.config = TuyaConfig(access_id="test_id", access_secret=SECRET, api_region="us")
+    return client
+
+
+def _encrypt(payload: dict, access_secret: str = SECRET) -> str:
+    plaintext = json.dumps(payload).encode()
+    pad_len = 16 - len(plaintext) % 16
+    plaintext += bytes([pad_len]) * pad_len
+    cipher = AES.new(access_secret[8:24].encode(), AES.MODE_ECB)
+    return base64.b64encode(cipher.encrypt(plaintext)).decode()
+
+
+def _event(device_id: str) -> TuyaEvent:
+    return TuyaEvent("dp_report", device_id, "prod1", {}, 0)
+
+
+_PAYLOAD = {
+    "bizCode": "dp_report",
+    "devId": "dev1",
+    "productKey": "prod1",
+    "data": {"switch_1": True},
+    "ts": 1700000000000,
+}
+
+
+class TestDecodePayload:
+    def test_encrypted_payload(self):
+        event = _decode_payload(_encrypt(_PAYLOAD), access_secret=SECRET, keep_raw=True)
+        assert event is not None
+        assert event.event_type == "dp_report"
+        assert event.device_id == "dev1"
+        assert event.product_id == "prod1"
+        assert event.data == {"switch_1": True}
+        assert event.timestamp == 1700000000000
+        assert event.raw == _PAYLOAD
+        assert json.loads(event.raw_json) == _PAYLOAD
+
+    def test_raw_not_kept_by_default(self):
+        event = _decode_payload(_encrypt(_PAYLOAD), access_secret=SECRET)
+        assert event is not None
+        assert event.raw is None
+        assert event.raw_json is None
+
+    def test_unencrypted_payload(self):
+        payload_b64 = base64.b64encode(json.dumps(_PAYLOAD).encode()).decode()
+        event = _decode_payload(payload_b64)
+        assert event is not None
+        assert event.device_id == "dev1"
+
+    def test_non_dict_data_is_wrapped(self):
+        payload = {**_PAYLOAD, "data": 42}
+        event = _decode_payload(_encrypt(payload), access_secret=SECRET)
+        assert event is not None
+        assert event.data == {"value": 42}
+
+    def test_missing_payload(self):
+        assert _decode_payload(None) is None
+
+    def test_undecodable_payload(self):
+        assert _decode_payload("not-base64!", access_secret=SECRET) is None
+
+
+class TestAckFrame:
+    def test_matches_json_encoding(self):
+        message_id = "CAAQADAAOAFAAA=="
+        assert json.loads(_ack_frame(message_id)) == {"messageId": message_id}
+        assert _ack_frame(message_id) == '{"messageId":"CAAQADAAOAFAAA=="}'
+
+    def test_escapes_unexpected_characters(self):
+        message_id = 'a"b\\c'
+        assert json.loads(_ack_frame(message_id)) == {"messageId": message_id}
+
+
+class _FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def send(self, frame: str) -> None:
+        self.sent.append(frame)
+
+
+class TestAckBatcher:
+    @pytest.mark.asyncio
+    async def test_flushes_pending_on_close(self):
+        ws = _FakeWebSocket()
+        acks = _AckBatcher(ws, flush_interval=60)
+        acks.add("m1")
+        acks.add("")
+        acks.add("m2")
+        assert ws.sent == []
+
+        await acks.aclose()
+        assert [json.loads(f)["messageId"] for f in ws.sent] == ["m1", "m2"]
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_is_full(self):
+        ws = _FakeWebSocket()
+        acks = _AckBatcher(ws, max_batch=2, flush_interval=60)
+        acks.add("m1")
+        acks.add("m2")
+        await asyncio.sleep(0.01)
+        assert len(ws.sent) == 2
+
+        await acks.aclose()
+        assert len(ws.sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self):
+        ws = _FakeWebSocket()
+        acks = _AckBatcher(ws, flush_interval=0.01)
+        acks.add("m1")
+        await asyncio.sleep(0.05)
+        assert len(ws.sent) == 1
+        await acks.aclose()
+
+    @pytest.mark.asyncio
+    async def test_close_during_flush_sends_the_rest(self):
+        stalled = asyncio.Event()
+
+        class _StallingWebSocket(_FakeWebSocket):
+            async def send(self, frame: str) -> None:
+                if len(self.sent) == 1 and not stalled.is_set():
+                    stalled.set()
+                    await asyncio.Event().wait()  # cancelled by aclose()
+                self.sent.append(frame)
+
+        ws = _StallingWebSocket()
+        acks = _AckBatcher(ws, max_batch=3, flush_interval=60)
+        for message_id in ("m1", "m2", "m3"):
+            acks.add(message_id)
+        await stalled.wait()
+        await acks.aclose()
+        assert [json.loads(f)["messageId"] for f in ws.sent] == ["m1", "m2", "m3"]
+
+    @pytest.mark.asyncio
+    async def test_send_error_keeps_acks_pending(self):
+        class _FlakyWebSocket(_FakeWebSocket):
+            failed = False
+
+            async def send(self, frame: str) -> None:
+                if not self.failed:
+                    self.failed = True
+                    raise RuntimeError("send failed")
+                self.sent.append(frame)
+
+        ws = _FlakyWebSocket()
+        acks = _AckBatcher(ws, max_batch=1, flush_interval=60)
+        acks.add("m1")
+        await asyncio.sleep(0.01)
+        assert ws.failed and not acks._task.done()
+        acks.add("m2")
+        await asyncio.sleep(0.01)
+        assert [json.loads(f)["messageId"] for f in ws.sent] == ["m1", "m2"]
+        await acks.aclose()
+
+
+class TestSplitEnvelope:
+    FRAME = json.dumps(
+        {"messageId": "CAAQAA==", "payload": "eyJhIjoxfQ==", "properties": {}},
+        separators=(",", ":"),
+    )
+
+    @pytest.mark.parametrize("have_orjson", [True, False])
+    def test_extracts_fields(self, monkeypatch, have_orjson):
+        monkeypatch.setattr("tuya_agent.events.HAVE_ORJSON", have_orjson)
+        assert _split_envelope(self.FRAME) == ("CAAQAA==", "eyJhIjoxfQ==")
+        assert _split_envelope(self.FRAME.encode()) == ("CAAQAA==", "eyJhIjoxfQ==")
+
+    @pytest.mark.parametrize(
+        "envelope",
+        [
+            {"messageId": "m1", "payload": "p1", "properties": {"payload": "nested"}},
+            {"properties": {"messageId": "nested"}, "messageId": "m1", "payload": "p1"},
+            {"messageId": "m\"1", "payload": "p1"},
+            {"messageId": "m1"},
+        ],
+    )
+    def test_scan_falls_back_to_full_parse(self, monkeypatch, envelope):
+        monkeypatch.setattr("tuya_agent.events.HAVE_ORJSON", False)
+        frame = json.dumps(envelope, separators=(",", ":"))
+        assert _split_envelope(frame) == (envelope["messageId"], envelope.get("payload"))
+
+
+class TestCallbackWorker:
+    @pytest.mark.asyncio
+    async def test_runs_sync_callbacks_in_order(self):
+        seen: list[str] = []
+        worker = _CallbackWorker(lambda e: seen.append(e.device_id))
+        for i in range(5):
+            await worker.put(_event(f"dev{i}"))
+        await worker.aclose()
+        assert seen == [f"dev{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_awaits_coroutine_callbacks(self):
+        seen: list[str] = []
+
+        async def callback(event: TuyaEvent) -> None:
+            await asyncio.sleep(0)
+            seen.append(event.device_id)
+
+        worker = _CallbackWorker(callback)
+        await worker.put(_event("dev1"))
+        await worker.put(_event("dev2"))
+        await worker.aclose()
+        assert seen == ["dev1", "dev2"]
+
+    @pytest.mark.asyncio
+    async def test_callback_errors_do_not_stop_the_worker(self):
+        seen: list[str] = []
+
+        def callback(event: TuyaEvent) -> None:
+            if event.device_id == "bad":
+                raise RuntimeError("boom")
+            seen.append(event.device_id)
+
+        worker = _CallbackWorker(callback)
+        await worker.put(_event("bad"))
+        await worker.put(_event("good"))
+        await worker.aclose()
+        assert seen == ["good"]
+
+    @pytest.mark.asyncio
+    async def test_put_waits_when_queue_is_full(self):
+        release = asyncio.Event()
+
+        async def callback(event: TuyaEvent) -> None:
+            await release.wait()
+
+        worker = _CallbackWorker(callback, maxsize=1)
+        await worker.put(_event("dev1"))  # picked up by the worker
+        await asyncio.sleep(0)
+        await worker.put(_event("dev2"))  # fills the queue
+        blocked = asyncio.create_task(worker.put(_event("dev3")))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        release.set()
+        await blocked
+        await worker.aclose()
+
+    @pytest.mark.asyncio
+    async def test_blocking_sync_callback_does_not_stall_the_loop(self):
+        started = threading.Event()
+        release = threading.Event()
+        released: list[bool] = []
+
+        def callback(event: TuyaEvent) -> None:
+            started.set()
+            released.append(release.wait(timeout=1))
+
+        worker = _CallbackWorker(callback)
+        await worker.put(_event("dev1"))
+        await asyncio.to_thread(started.wait)
+        release.set()  # only reached while the callback is still blocked
+        await worker.aclose()
+        assert released == [True]
+
+    @pytest.mark.asyncio
+    async def test_aclose_gives_up_on_a_hung_callback(self):
+        async def callback(event: TuyaEvent) -> None:
+            await asyncio.Event().wait()
+
+        worker = _CallbackWorker(callback, drain_timeout=0.01)
+        await worker.put(_event("dev1"))
+        await worker.put(_event("dev2"))
+        await asyncio.wait_for(worker.aclose(), timeout=1)
+
+
+class TestCollect:
+    @pytest.mark.asyncio
+    async def test_stops_at_deadline_and_closes_stream(self, monkeypatch):
+        closed = asyncio.Event()
+
+        async def fake_subscribe(self, **kwargs):
+            try:
+                for i in range(2):
+                    yield TuyaEvent("dp_report", f"dev{i}", "prod1", {}, i)
+                await asyncio.sleep(3600)
+            finally:
+                closed.set()
+
+        monkeypatch.setattr(EventsMixin, "subscribe", fake_subscribe)
+        events = await EventsMixin(_client()).collect(duration_seconds=0.05)
+
+        assert [e.device_id for e in events] == ["dev0", "dev1"]
+        assert closed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_stops_when_stream_ends(self, monkeypatch):
+        async def fake_subscribe(self, *, max_events=None, **kwargs):
+            for i in range(max_events):
+                yield TuyaEvent("online", f"dev{i}", "prod1", {}, i)
+
+        monkeypatch.setattr(EventsMixin, "subscribe", fake_subscribe)
+        events = await EventsMixin(_client()).collect(duration_seconds=60, max_events=3)
+
+        assert len(events) == 3
+
+    @pytest.mark.asyncio
+    async def test_does_not_spawn_a_task_per_event(self, monkeypatch):
+        async def fake_subscribe(self, *, max_events=None, **kwargs):
+            for i in range(max_events):
+                await asyncio.sleep(0)
+                yield TuyaEvent("online", f"dev{i}", "prod1", {}, i)
+
+        monkeypatch.setattr(EventsMixin, "subscribe", fake_subscribe)
+        loop = asyncio.get_running_loop()
+        created = 0
+
+        def counting_factory(loop, coro, **kwargs):
+            nonlocal created
+            created += 1
+            return asyncio.Task(coro, loop=loop, **kwargs)
+
+        loop.set_task_factory(counting_factory)
+        try:
+            events = await EventsMixin(_client()).collect(duration_seconds=60, max_events=50)
+        finally:
+            loop.set_task_factory(None)
+
+        assert len(events) == 50
+        assert created <= 1
+
+
+class TestAuthHeaders:
+    def test_computed_once_and_refreshable(self):
+        client = _client()
+        events = EventsMixin(client)
+        assert events._auth_headers["username"] == "test_id"
+        assert events._auth_headers["password"] == _ws_password("test_id", SECRET)
+
+        client.config = TuyaConfig(access_id="other_id", access_secret=SECRET, api_region="us")
+        assert events._auth_headers["username"] == "test_id"
+        events.refresh_auth()
+        assert events._auth_headers["username"] == "other_id"
+
+
+class TestReconnectDelay:
+    def test_grows_exponentially_within_jitter(self):
+        for attempt, base in [(0, 1.0), (1, 2.0), (3, 8.0)]:
+            delays = [_reconnect_delay(attempt) for _ in range(50)]
+            assert all(0.5 * base <= d <= 1.5 * base for d in delays)
+
+    def test_is_capped(self):
+        assert all(_reconnect_delay(30) <= 90.0 for _ in range(50))
+
+
+class _FrameSocket(_FakeWebSocket):
+    def __init__(self, frames: list[str]) -> None:
+        super().__init__()
+        self._frames = frames
+
+    async def __aiter__(self):
+        for frame in self._frames:
+            yield frame
+
+
+class TestSubscribe:
+    @pytest.mark.asyncio
+    async def test_redelivered_messages_are_acked_not_yielded(self, monkeypatch):
+        def frame(message_id: str, ts: int) -> str:
+            body = _encrypt({**_PAYLOAD, "ts": ts})
+            return json.dumps({"messageId": message_id, "payload": body})
+
+        ws = _FrameSocket([frame("m1", 1), frame("m2", 2), frame("m1", 1)])
+
+        async def connect(*args, **kwargs):
+            yield ws
+
+        monkeypatch.setattr("tuya_agent.events.websockets.connect", connect)
+        events = EventsMixin(_client())
+        seen = [event.timestamp async for event in events.subscribe()]
+        assert seen == [1, 2]
+        assert ws.sent.count(_ack_frame("m1")) == 2
+        assert ws.sent.count(_ack_frame("m2")) == 1
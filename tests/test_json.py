@@ -0,0 +1,35 @@
+"""Tests for the shared JSON helpers."""
+
+from __future__ import annotations
+
+import importlib
+import json
+import sys
+
+import tuya_agent._json
+from tuya_agent._json import dumps, loads
+
+
+class TestJson:
+    def test_dumps_is_compact_bytes(self):
+        out = dumps({"commands": [{"code": "switch_1", "value": True}]})
+        assert out == b'{"commands":[{"code":"switch_1","value":true}]}'
+
+    def test_round_trip_non_ascii(self):
+        obj = {"name": "Küche", "n": [1, 2.5, None]}
+        assert loads(dumps(obj)) == obj
+        assert json.loads(dumps(obj)) == obj
+
+    def test_loads_accepts_str_and_bytes(self):
+        assert loads('{"a":1}') == loads(b'{"a":1}') == {"a": 1}
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        fallback = importlib.reload(tuya_agent._json)
+        try:
+            assert fallback.orjson is None
+            assert fallback.dumps({"a": [1, True]}) == b'{"a":[1,true]}'
+            assert fallback.loads(b'{"a":1}') == {"a": 1}
+        finally:
+            monkeypatch.undo()
+            importlib.reload(tuya_agent._json)
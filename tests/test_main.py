@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import os
+import signal
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from tuya_agent.__main__ import _run_status, main
+from tuya_agent.__main__ import _run_daemon, _run_status, main
 from tuya_agent.collector import CollectionResult
 from tuya_agent.storage import LogStorage
 
@@ -24,11 +27,11 @@ class TestMainParser:
     def test_collect_parses_defaults(self) -> None:
         with (
             patch("sys.argv", ["tuya_agent", "collect"]),
-            patch("tuya_agent.__main__.asyncio") as mock_asyncio,
+            patch("tuya_agent.__main__.run") as mock_run,
             patch("tuya_agent.__main__.logging"),
         ):
             main()
-            mock_asyncio.run.assert_called_once()
+            mock_run.assert_called_once()
 
     def test_serve_parses_host_port(self) -> None:
         with (
@@ -46,11 +49,11 @@ class TestMainParser:
     def test_watch_parses_duration(self) -> None:
         with (
             patch("sys.argv", ["tuya_agent", "watch", "--duration", "30"]),
-            patch("tuya_agent.__main__.asyncio") as mock_asyncio,
+            patch("tuya_agent.__main__.run") as mock_run,
             patch("tuya_agent.__main__.logging"),
         ):
             main()
-            mock_asyncio.run.assert_called_once()
+            mock_run.assert_called_once()
 
 
 class TestRunStatus:
@@ -126,3 +129,29 @@ class TestRunCollect:
             )
             await _run_collect(args)
             mock_collector.collect_all.assert_called_once()
+
+
+class TestRunDaemon:
+    """Signal handling around the collector daemon."""
+
+    @pytest.mark.asyncio
+    async def test_second_signal_cancels_current_run(self) -> None:
+        started = asyncio.Event()
+
+        async def _long_run() -> None:
+            started.set()
+            await asyncio.Event().wait()  # a run that ignores stop()
+
+        collector = MagicMock()
+        collector.run_daemon = _long_run
+        task = asyncio.create_task(_run_daemon(collector))
+        await started.wait()
+
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.sleep(0.01)
+        collector.stop.assert_called_once()
+        assert not task.done()
+
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(task, timeout=1)
+        assert collector.stop.call_count == 1
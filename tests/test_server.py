@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import threading
 from pathlib import Path
-from typing import NamedTuple
-from unittest.mock import AsyncMock, MagicMock
+from typing import Any, NamedTuple
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 import httpx
 import pytest
 from httpx import ASGITransport
 
-from tuya_agent.client import TuyaAPIError
-from tuya_agent.server import EventBroadcaster, create_app
+from tuya_agent.client import TuyaAPIError, TuyaClient
+from tuya_agent.devices import DevicesMixin
+from tuya_agent.scenes import ScenesMixin
+from tuya_agent.server import BroadcastRing, EventBroadcaster, create_app
+from tuya_agent.spaces import SpacesMixin
 from tuya_agent.storage import LogRecord, LogStorage
 
 
@@ -27,14 +32,33 @@ class ServerFixture(NamedTuple):
 # ---------------------------------------------------------------------------
 
 
+def _amock(result: object) -> Mock:
+    """A mock coroutine function returning *result*.
+
+    Cheaper to build than AsyncMock, and records calls the same way.
+    """
+
+    async def _result(*args: object, **kwargs: object) -> object:
+        return result
+
+    return Mock(side_effect=_result)
+
+
 def _mock_client() -> MagicMock:
-    """Build a mock TuyaClient with nested domain mocks."""
-    client = MagicMock()
-    client.ensure_token = AsyncMock()
-    client.close = AsyncMock()
+    """Build a mock TuyaClient with nested domain mocks.
+
+    The mocks are specced, so a test touching a method the real client
+    lacks fails instead of getting an auto-created child mock.
+    """
+    client = MagicMock(spec=TuyaClient)
+    client.devices = MagicMock(spec_set=DevicesMixin)
+    client.scenes = MagicMock(spec_set=ScenesMixin)
+    client.spaces = MagicMock(spec_set=SpacesMixin)
+    client.ensure_token = _amock(None)
+    client.close = _amock(None)
 
     # devices
-    client.devices.list = AsyncMock(return_value={
+    client.devices.list = _amock({
         "list": [
             {"id": "dev1", "name": "Light", "online": True, "category": "dj"},
         ],
@@ -42,31 +66,31 @@ def _mock_client() -> MagicMock:
         "has_more": False,
         "last_row_key": "",
     })
-    client.devices.get = AsyncMock(return_value={
+    client.devices.get = _amock({
         "id": "dev1", "name": "Light", "online": True,
     })
-    client.devices.get_status = AsyncMock(return_value=[
+    client.devices.get_status = _amock([
         {"code": "switch_1", "value": True},
     ])
-    client.devices.get_specification = AsyncMock(return_value={
+    client.devices.get_specification = _amock({
         "category": "dj", "functions": [], "status": [],
     })
-    client.devices.get_functions = AsyncMock(return_value={
+    client.devices.get_functions = _amock({
         "functions": [
             {"code": "switch_1", "type": "Boolean", "values": "{}"},
         ],
     })
-    client.devices.send_commands = AsyncMock(return_value=True)
+    client.devices.send_commands = _amock(True)
 
     # scenes (v2.0 Cloud API)
-    client.scenes.list_rules = AsyncMock(return_value={
+    client.scenes.list_rules = _amock({
         "list": [{"id": "sc1", "name": "Good Night", "type": "tap_to_run"}],
         "total": 1,
     })
-    client.scenes.trigger_rule = AsyncMock(return_value=True)
+    client.scenes.trigger_rule = _amock(True)
 
     # spaces
-    client.spaces.get = AsyncMock(return_value={
+    client.spaces.get = _amock({
         "id": 12345, "name": "My Home", "root_id": 12345, "status": True,
     })
 
@@ -98,24 +122,27 @@ def _seed_storage(storage: LogStorage) -> None:
     storage.record_run_end(run_id, devices=2, logs=3)
 
 
+@pytest.fixture(scope="module")
+def app_state() -> tuple[ASGITransport, dict[str, Any]]:
+    """One app per module; tests swap the injected objects in its state."""
+    state: dict[str, Any] = {"client": None, "storage": None, "broadcaster": None}
+    return ASGITransport(app=create_app(_test_state=state)), state
+
+
 @pytest.fixture
-async def fx():
+async def fx(app_state: tuple[ASGITransport, dict[str, Any]]):
     """Async test client with mocked Tuya deps and seeded storage."""
+    transport, state = app_state
     mock_tuya = _mock_client()
     storage = LogStorage(Path(":memory:"))
     storage.open()
     _seed_storage(storage)
-    broadcaster = EventBroadcaster(client=mock_tuya)
-
-    app = create_app(
-        _test_state={
-            "client": mock_tuya,
-            "storage": storage,
-            "broadcaster": broadcaster,
-        },
+    state.update(
+        client=mock_tuya,
+        storage=storage,
+        broadcaster=EventBroadcaster(client=mock_tuya),
     )
 
-    transport = ASGITransport(app=app)
     async with httpx.AsyncClient(
         transport=transport, base_url="http://testserver",
     ) as ac:
@@ -246,6 +273,21 @@ class TestStorageEndpoints:
         assert data["total_devices"] == 2
         assert data["total_runs"] == 1
 
+    async def test_storage_runs_off_event_loop(
+        self, fx: ServerFixture, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        threads: list[int] = []
+        get_stats = fx.storage.get_stats
+
+        def spy() -> dict[str, int]:
+            threads.append(threading.get_ident())
+            return get_stats()
+
+        monkeypatch.setattr(fx.storage, "get_stats", spy)
+        resp = await fx.http.get("/api/logs/stats")
+        assert resp.status_code == 200
+        assert threads and threads[0] != threading.get_ident()
+
     async def test_get_bookmarks(self, fx: ServerFixture) -> None:
         resp = await fx.http.get("/api/logs/bookmarks")
         assert resp.status_code == 200
@@ -263,23 +305,119 @@ class TestStorageEndpoints:
         assert data[0]["status"] == "completed"
 
 
+class _ResponseStartedError(Exception):
+    """Raised from ``send`` to stop an ASGI app once headers are sent."""
+
+
+async def _response_start(app: Any, path: str) -> dict[str, Any]:
+    """Call *app* directly and return its ``http.response.start`` message.
+
+    Streaming responses never finish, so the app is stopped as soon as the
+    headers are out instead of waiting on a timeout.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "server": ("testserver", 80),
+    }
+    started: dict[str, Any] = {}
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.Event()
+
+    async def receive() -> dict[str, Any]:
+        if requests:
+            return requests.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            started.update(message)
+            disconnected.set()
+            raise _ResponseStartedError
+
+    try:
+        await app(scope, receive, send)
+    except _ResponseStartedError:
+        pass
+    return started
+
+
 class TestSSEEndpoint:
     async def test_event_stream_content_type(
-        self, fx: ServerFixture,
+        self, fx: ServerFixture, app_state: tuple[ASGITransport, dict[str, Any]],
     ) -> None:
-        import asyncio
-
-        async def _check() -> None:
-            async with fx.http.stream(
-                "GET", "/api/events/stream",
-            ) as resp:
-                assert resp.status_code == 200
-                assert "text/event-stream" in resp.headers.get(
-                    "content-type", "",
-                )
-
-        # The SSE endpoint streams forever; we only need the headers.
-        try:
-            await asyncio.wait_for(_check(), timeout=2.0)
-        except (asyncio.TimeoutError, asyncio.CancelledError):
-            pass  # Expected — we just needed to verify the headers.
+        message = await _response_start(app_state[0].app, "/api/events/stream")
+        assert message["status"] == 200
+        headers = dict(message["headers"])
+        assert b"text/event-stream" in headers[b"content-type"]
+
+
+class TestEventBroadcaster:
+    async def test_fan_out_serialises_once_for_all_clients(self) -> None:
+        import json
+
+        from tuya_agent.events import TuyaEvent
+
+        broadcaster = EventBroadcaster(client=MagicMock())
+        s1, s2 = broadcaster.stream(), broadcaster.stream()
+        t1, t2 = asyncio.create_task(anext(s1)), asyncio.create_task(anext(s2))
+        await asyncio.sleep(0)
+        assert broadcaster._clients == 2
+
+        broadcaster._fan_out(
+            TuyaEvent("dp_report", "dev1", "prod1", {"switch_1": True}, 1700000000000),
+        )
+        frame = await t1
+        assert await t2 is frame
+        assert frame.startswith("data: ") and frame.endswith("\n\n")
+        assert json.loads(frame[len("data: "):]) == {
+            "event_type": "dp_report",
+            "device_id": "dev1",
+            "product_id": "prod1",
+            "data": {"switch_1": True},
+            "timestamp": 1700000000000,
+        }
+
+        await s1.aclose()
+        await s2.aclose()
+        assert broadcaster._clients == 0
+
+    async def test_stream_sends_keepalive_when_idle(self) -> None:
+        broadcaster = EventBroadcaster(client=MagicMock())
+        stream = broadcaster.stream(keepalive=0.01)
+        assert await anext(stream) == ": keepalive\n\n"
+        await stream.aclose()
+
+
+class TestBroadcastRing:
+    async def test_read_returns_frames_after_cursor(self) -> None:
+        ring = BroadcastRing()
+        ring.publish("a")
+        ring.publish("b")
+        ring.publish("c")
+        assert await ring.read(1, timeout=0) == (3, ["b", "c"])
+
+    async def test_lagging_reader_skips_rotated_frames(self) -> None:
+        ring = BroadcastRing(maxlen=2)
+        for frame in "abcd":
+            ring.publish(frame)
+        assert await ring.read(0, timeout=0) == (4, ["c", "d"])
+
+    async def test_read_waits_for_publish(self) -> None:
+        ring = BroadcastRing()
+        reader = asyncio.create_task(ring.read(0, timeout=5))
+        await asyncio.sleep(0)
+        ring.publish("a")
+        assert await reader == (1, ["a"])
+        assert await ring.read(1, timeout=0.01) == (1, [])
+
+    async def test_wait_does_not_spawn_tasks(self) -> None:
+        ring = BroadcastRing()
+        before = len(asyncio.all_tasks())
+        readers = [asyncio.create_task(ring.read(0, timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert len(asyncio.all_tasks()) == before + len(readers)
+        ring.publish("a")
+        assert await asyncio.gather(*readers) == [(1, ["a"])] * 3
@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from tuya_agent.storage import LogRecord, LogStorage
+import pytest
+
+from tuya_agent.storage import LogRecord, LogStorage, decode_raw_json, encode_raw_json
 
 
 def _make_record(
@@ -34,6 +38,47 @@ class TestLogStorage:
             ).fetchone()
             assert row[0] == 0
 
+    def test_dedup_index_covers_device_time_lookups(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            plan = storage.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT event_id FROM device_logs "
+                "WHERE device_id = ? AND event_time >= ? ORDER BY event_time",
+                ("dev1", 0),
+            ).fetchall()
+            detail = " ".join(row[-1] for row in plan)
+            assert "sqlite_autoindex_device_logs" in detail
+            assert "TEMP B-TREE" not in detail
+
+    def test_schema_skips_autoincrement(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            storage.insert_logs([_make_record()])
+            first = storage.record_run_start()
+            assert storage.record_run_start() == first + 1
+            tables = {
+                row[0] for row in storage.conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'",
+                )
+            }
+            assert "sqlite_sequence" not in tables
+
+    def test_open_applies_pragmas(self, tmp_path: Path) -> None:
+        with LogStorage(tmp_path / "logs.db") as storage:
+            mode = storage.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            sync = storage.conn.execute("PRAGMA synchronous").fetchone()[0]
+            assert mode == "wal"
+            assert sync == 1  # NORMAL
+            storage.insert_logs([_make_record()])
+            storage.checkpoint()
+            assert storage.get_stats()["total_logs"] == 1
+
+    def test_read_pool_connections_share_pragmas(self, tmp_path: Path) -> None:
+        with LogStorage(tmp_path / "logs.db", readers=1) as storage:
+            with storage._reader() as conn:
+                assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 268435456
+                assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+                assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+            assert storage.conn.execute("PRAGMA mmap_size").fetchone()[0] == 268435456
+
     def test_insert_and_retrieve_stats(self) -> None:
         with LogStorage(Path(":memory:")) as storage:
             records = [
@@ -54,6 +99,93 @@ class TestLogStorage:
             assert inserted == 0
             assert storage.get_stats()["total_logs"] == 1
 
+    def test_deduplication_across_instances(self, tmp_path: Path) -> None:
+        # The second writer seeded its memory before the first wrote the
+        # row; the UNIQUE key alone must drop the repeat.
+        db = tmp_path / "logs.db"
+        with LogStorage(db) as first, LogStorage(db) as second:
+            second.insert_logs([_make_record(event_id=9)])
+            first.insert_logs([_make_record()])
+            assert second.insert_logs([_make_record(), _make_record(event_id=2)]) == 1
+            assert second.get_stats()["total_logs"] == 3
+
+    def test_reopened_storage_remembers_stored_keys(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        import tuya_agent.storage as storage_mod
+
+        db = tmp_path / "logs.db"
+        with LogStorage(db) as storage:
+            storage.insert_logs([_make_record(), _make_record(event_id=2)])
+        encoded: list[str | bytes] = []
+        real_encode = storage_mod.encode_raw_json
+        monkeypatch.setattr(
+            storage_mod, "encode_raw_json", lambda text: encoded.append(text) or real_encode(text),
+        )
+        with LogStorage(db) as storage:
+            assert storage.insert_logs([_make_record(), _make_record(event_id=3)]) == 1
+        assert len(encoded) == 1
+
+    @pytest.mark.parametrize("stored_id", ["0123", "\u0661\u0662\u0663", "+123"])
+    def test_reopened_storage_keeps_text_ids_distinct(
+        self, tmp_path: Path, stored_id: str,
+    ) -> None:
+        db = tmp_path / "logs.db"
+        with LogStorage(db) as storage:
+            storage.insert_logs([_make_record(event_id=stored_id)])  # type: ignore[arg-type]
+        with LogStorage(db) as storage:
+            assert storage.insert_logs([_make_record(event_id=123)]) == 1
+            assert storage.get_stats()["total_logs"] == 2
+
+    def test_insert_rejects_not_null_violations(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            with pytest.raises(sqlite3.IntegrityError):
+                storage.insert_logs([_make_record(code=None)])  # type: ignore[arg-type]
+            assert storage.insert_logs([_make_record()]) == 1
+
+    def test_failed_batch_is_rolled_back(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            assert storage.get_stats()["total_devices"] == 0
+            batch = [
+                _make_record(device_id="dev2", event_id=1),
+                _make_record(device_id="dev2", event_id=2),
+                _make_record(device_id="dev2", event_id=3, code=None),  # type: ignore[arg-type]
+            ]
+            with pytest.raises(sqlite3.IntegrityError):
+                storage.insert_logs(batch)
+            assert not storage.conn.in_transaction
+            assert storage.get_stats() == {"total_logs": 0, "total_devices": 0, "total_runs": 0}
+            assert storage.insert_logs([_make_record(event_id=10)]) == 1
+            rows = storage.conn.execute("SELECT device_id, event_id FROM device_logs").fetchall()
+            assert rows == [("dev1", "10")]
+
+    def test_recent_duplicates_skip_encoding(
+        self, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        import tuya_agent.storage as storage_mod
+
+        encoded: list[str] = []
+        real_encode = storage_mod.encode_raw_json
+
+        def spy(text: str) -> bytes:
+            encoded.append(text)
+            return real_encode(text)
+
+        monkeypatch.setattr(storage_mod, "encode_raw_json", spy)
+        with LogStorage(Path(":memory:")) as storage:
+            storage.insert_logs([_make_record(), _make_record(event_id=2)])
+            assert storage.insert_logs([_make_record(), _make_record(event_id=3)]) == 1
+            assert storage.insert_logs([_make_record(event_id=2)]) == 0
+            assert len(encoded) == 3
+            assert storage.get_stats()["total_logs"] == 3
+
+    def test_rollback_forgets_recent_keys(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            with pytest.raises(RuntimeError), storage.transaction():
+                storage.insert_logs([_make_record()])
+                raise RuntimeError("boom")
+            assert storage.insert_logs([_make_record()]) == 1
+
     def test_bookmark_round_trip(self) -> None:
         with LogStorage(Path(":memory:")) as storage:
             assert storage.get_device_bookmark("dev1") is None
@@ -88,6 +220,118 @@ class TestLogStorage:
             stats = storage.get_stats()
             assert stats["total_devices"] == 2
 
+    def test_stats_cached_until_write(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            storage.insert_logs([_make_record(device_id="dev1")])
+            assert storage.get_stats()["total_devices"] == 1
+            # Bypass the write path: the cached counts are served as-is.
+            storage.conn.execute(
+                "INSERT INTO collection_runs (started_at) VALUES (0)",
+            )
+            assert storage.get_stats()["total_runs"] == 0
+            storage.insert_logs([_make_record(device_id="dev2")])
+            stats = storage.get_stats()
+            assert stats == {"total_logs": 2, "total_devices": 2, "total_runs": 1}
+            storage.record_run_start()
+            assert storage.get_stats()["total_runs"] == 2
+
+    def test_stats_see_other_connections(self, tmp_path: Path) -> None:
+        db = tmp_path / "logs.db"
+        with LogStorage(db) as reader, LogStorage(db) as writer:
+            assert reader.get_stats()["total_logs"] == 0
+            writer.insert_logs([_make_record(device_id="dev1")])
+            writer.record_run_start()
+            stats = reader.get_stats()
+            assert stats == {"total_logs": 1, "total_devices": 1, "total_runs": 1}
+
+    def test_read_pool_serves_queries(self, tmp_path: Path) -> None:
+        with LogStorage(tmp_path / "logs.db", readers=2) as storage:
+            assert storage.get_stats()["total_logs"] == 0
+            storage.insert_logs([_make_record(), _make_record(event_id=2)])
+            storage.record_run_start()
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda _: storage.query_logs(), range(8)))
+            assert all(total == 2 for _, total in results)
+            assert storage.get_stats() == {
+                "total_logs": 2, "total_devices": 1, "total_runs": 1,
+            }
+            with storage._reader() as conn, pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM device_logs")
+
+    def test_read_pool_skipped_for_memory_db(self) -> None:
+        with LogStorage(Path(":memory:"), readers=2) as storage:
+            storage.insert_logs([_make_record()])
+            assert storage.query_logs()[1] == 1
+
+    def test_raw_json_is_stored_compressed(self) -> None:
+        raw = (
+            '{"event_id":7,"event_time":1700000000000,"event_from":"1",'
+            '"code":"switch_1","value":"true","status":"1"}'
+        )
+        with LogStorage(Path(":memory:")) as storage:
+            storage.insert_logs([_make_record(raw_json=raw)])
+            storage.insert_logs([_make_record(event_id=2, raw_json=raw.encode())])
+            stored = [
+                row[0]
+                for row in storage.conn.execute("SELECT raw_json FROM device_logs")
+            ]
+        assert len(stored) == 2
+        for value in stored:
+            assert isinstance(value, bytes)
+            assert len(value) < len(raw) / 2
+            assert decode_raw_json(value) == raw
+
+    def test_decode_raw_json_passes_legacy_text_through(self) -> None:
+        assert decode_raw_json('{"a": 1}') == '{"a": 1}'
+        assert decode_raw_json(encode_raw_json("{}")) == "{}"
+        assert encode_raw_json(b'{"a":1}') == encode_raw_json('{"a":1}')
+        with pytest.raises(ValueError):
+            decode_raw_json(b"\x7fgarbage")
+
+    def test_large_batch_commits_once(self) -> None:
+        records = [_make_record(event_id=i, event_time=1000 + i) for i in range(1000)]
+        with LogStorage(Path(":memory:")) as storage:
+            statements: list[str] = []
+            storage.conn.set_trace_callback(statements.append)
+            assert storage.insert_logs(records) == 1000
+            storage.conn.set_trace_callback(None)
+        assert sum(sql.startswith("COMMIT") for sql in statements) == 1
+
+    def test_insert_logs_many_shares_one_timestamp(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            inserted = storage.insert_logs_many([
+                [_make_record("dev1", 1), _make_record("dev1", 2)],
+                [],
+                [_make_record("dev2", 1), _make_record("dev1", 1)],
+            ])
+            assert inserted == 3
+            stamps = storage.conn.execute(
+                "SELECT DISTINCT collected_at FROM device_logs"
+            ).fetchall()
+            assert len(stamps) == 1
+            assert not storage.conn.in_transaction
+
+    def test_transaction_commits_grouped_writes(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            with storage.transaction():
+                storage.insert_logs([_make_record()])
+                storage.set_device_bookmark("dev1", 1700000000000)
+                assert storage.conn.in_transaction
+            assert not storage.conn.in_transaction
+            assert storage.get_stats()["total_logs"] == 1
+            assert storage.get_device_bookmark("dev1") == 1700000000000
+
+    def test_transaction_rolls_back_on_error(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            with pytest.raises(RuntimeError):
+                with storage.transaction():
+                    storage.insert_logs([_make_record()])
+                    with storage.transaction():
+                        storage.set_device_bookmark("dev1", 1700000000000)
+                    raise RuntimeError("boom")
+            assert storage.get_stats()["total_logs"] == 0
+            assert storage.get_device_bookmark("dev1") is None
+
     def test_from_api_factory(self) -> None:
         entry = {
             "event_id": 7,
@@ -158,6 +402,60 @@ class TestLogStorage:
             assert total == 5
             assert len(rows) == 2
 
+    def test_query_logs_keyset_pagination(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            # Ties on event_time across devices must not be split or repeated.
+            storage.insert_logs([
+                _make_record(device_id=dev, event_id=i, event_time=1000 + i // 2)
+                for i in range(6)
+                for dev in ("d1", "d2")
+            ])
+            seen: list[tuple[int, str, str]] = []
+            before = None
+            while True:
+                rows, total = storage.query_logs(limit=5, before=before)
+                assert total == 12
+                if not rows:
+                    break
+                keys = [(r["event_time"], r["device_id"], r["event_id"]) for r in rows]
+                seen.extend(keys)
+                before = keys[-1]
+            assert len(seen) == 12
+            assert seen == sorted(set(seen), reverse=True)
+
+    def test_query_logs_global_order_uses_index(self) -> None:
+        with LogStorage(Path(":memory:")) as storage:
+            plan = storage.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT event_id FROM device_logs "
+                "WHERE (event_time, device_id, event_id) < (?, ?, ?) "
+                "ORDER BY event_time DESC, device_id DESC, event_id DESC LIMIT 50",
+                (1000, "d1", "1"),
+            ).fetchall()
+            detail = " ".join(row[-1] for row in plan)
+            assert "idx_device_logs_time_key" in detail
+            assert "TEMP B-TREE" not in detail
+
+    def test_query_logs_total_memoised_until_write(self, tmp_path: Path) -> None:
+        db = tmp_path / "logs.db"
+        with LogStorage(db) as storage, LogStorage(db) as other:
+            storage.insert_logs([_make_record(device_id="d1"), _make_record(device_id="d2")])
+            assert storage.query_logs()[1] == 2
+            assert storage.query_logs(device_id="d1")[1] == 1
+            # Bypass the write path: memoised totals are served as-is ...
+            storage.conn.execute(
+                "INSERT INTO device_logs (device_id, event_id, event_time, raw_json, "
+                "collected_at) VALUES ('d1', '9', 9, x'', 0)",
+            )
+            assert storage.query_logs()[1] == 2
+            # ... but filtered totals are always counted.
+            assert storage.query_logs(device_id="d1", end_time=10**13)[1] == 2
+            assert storage.query_logs(device_id="d1", start_time=0)[1] == 2
+            storage.conn.commit()
+            storage.insert_logs([_make_record(device_id="d2", event_id=2)])
+            assert storage.query_logs()[1] == 4
+            other.insert_logs([_make_record(device_id="d1", event_id=3)])
+            assert storage.query_logs(device_id="d1")[1] == 3
+
     def test_query_logs_empty(self) -> None:
         with LogStorage(Path(":memory:")) as storage:
             rows, total = storage.query_logs()
@@ -1,8 +1,11 @@
 """Tests for the agent tools registry and dispatcher."""
 
+import inspect
+import json
+
 import pytest
 
-from tuya_agent.tools import TOOLS, dispatch
+from tuya_agent.tools import _TOOLS_BY_NAME, TOOLS, TOOLS_JSON, dispatch
 
 
 class TestToolsRegistry:
@@ -18,6 +21,7 @@ class TestToolsRegistry:
         expected = {
             # Device tools
             "list_devices",
+            "list_all_devices",
             "get_device",
             "get_device_status",
             "get_device_specification",
@@ -70,13 +74,87 @@ class TestToolsRegistry:
         }
         assert expected.issubset(names), f"Missing tools: {expected - names}"
 
+    def test_schema_properties_match_signatures(self):
+        for tool in TOOLS:
+            params = list(inspect.signature(_TOOLS_BY_NAME[tool["name"]][0]).parameters)[1:]
+            assert set(params) == set(tool["parameters"].get("properties", {})), tool["name"]
+
+    def test_tools_json_matches_registry(self):
+        assert json.loads(TOOLS_JSON) == TOOLS
+
     def test_no_duplicate_tool_names(self):
         names = [t["name"] for t in TOOLS]
         assert len(names) == len(set(names)), "Duplicate tool names found"
 
+    def test_registering_duplicate_name_raises(self):
+        from tuya_agent.tools import _register
+
+        with pytest.raises(ValueError, match="Duplicate tool name: get_device"):
+            _register({"name": "get_device", "parameters": {}})(lambda client: None)
+
 
 class TestDispatch:
     @pytest.mark.asyncio
     async def test_unknown_tool_raises(self):
         with pytest.raises(ValueError, match="Unknown tool"):
             await dispatch(None, "nonexistent_tool", {})  # type: ignore[arg-type]
+
+    @pytest.mark.asyncio
+    async def test_dispatch_calls_registered_tool(self):
+        from unittest.mock import AsyncMock, MagicMock
+
+        client = MagicMock()
+        client.devices.get = AsyncMock(return_value={"id": "dev1"})
+        result = await dispatch(client, "get_device", {"device_id": "dev1"})
+        assert result == {"id": "dev1"}
+        client.devices.get.assert_awaited_once_with("dev1")
+
+    @pytest.mark.asyncio
+    async def test_list_all_devices_follows_pages(self):
+        from unittest.mock import MagicMock
+
+        async def iter_devices(*, page_size):
+            assert page_size == 50
+            for device_id in ("dev1", "dev2", "dev3"):
+                yield {"id": device_id}
+
+        client = MagicMock()
+        client.devices.iter_devices = iter_devices
+        result = await dispatch(client, "list_all_devices", {"page_size": 50})
+        assert [d["id"] for d in result["list"]] == ["dev1", "dev2", "dev3"]
+        assert result["total"] == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_or_unknown_arguments_raise(self):
+        from unittest.mock import MagicMock
+
+        with pytest.raises(ValueError, match="missing arguments: device_id"):
+            await dispatch(MagicMock(), "get_device", {})
+        with pytest.raises(ValueError, match="unknown arguments: colour"):
+            await dispatch(MagicMock(), "get_device", {"device_id": "dev1", "colour": "red"})
+
+    @pytest.mark.asyncio
+    async def test_storage_tools_reuse_one_connection(self, tmp_path, monkeypatch):
+        from unittest.mock import MagicMock
+
+        from tuya_agent import tools
+        from tuya_agent.storage import LogStorage
+
+        monkeypatch.setattr(tools, "_STORAGES", {})
+        opened = []
+        real_open = LogStorage.open
+
+        def counting_open(self):
+            opened.append(self)
+            real_open(self)
+
+        monkeypatch.setattr(LogStorage, "open", counting_open)
+        db_path = str(tmp_path / "logs.db")
+        try:
+            status = await dispatch(MagicMock(), "get_collection_status", {"db_path": db_path})
+            result = await dispatch(MagicMock(), "query_logs", {"db_path": db_path})
+        finally:
+            tools._close_storages()
+        assert status["total_logs"] == 0
+        assert result == {"logs": [], "total": 0}
+        assert len(opened) == 1
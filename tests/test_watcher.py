@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import json
+import sqlite3
 from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
 
 from tuya_agent.events import TuyaEvent
 from tuya_agent.storage import LogStorage
-from tuya_agent.watcher import event_to_record
+from tuya_agent.watcher import EventWatcher, _log_event, event_to_record
 
 
 def _make_event(
@@ -41,26 +45,26 @@ class TestEventToRecord:
         assert json.loads(record.value) == {"switch_1": True}
         assert record.raw_json  # non-empty
 
-    def test_event_id_is_deterministic(self) -> None:
-        event = _make_event()
-        r1 = event_to_record(event)
-        r2 = event_to_record(event)
-        assert r1.event_id == r2.event_id
-
-    def test_different_events_get_different_ids(self) -> None:
-        e1 = _make_event(timestamp=1700000000000)
-        e2 = _make_event(timestamp=1700000001000)
-        assert event_to_record(e1).event_id != event_to_record(e2).event_id
-
-    def test_different_data_get_different_ids(self) -> None:
-        e1 = _make_event(data={"switch_1": True})
-        e2 = _make_event(data={"switch_1": False})
-        assert event_to_record(e1).event_id != event_to_record(e2).event_id
+    @pytest.mark.parametrize(
+        ("changes", "same_id"),
+        [
+            pytest.param({}, True, id="deterministic"),
+            pytest.param({"data": {"switch_1": True}}, True, id="equal-data"),
+            pytest.param({"product_id": "prod2"}, True, id="product-ignored"),
+            pytest.param({"timestamp": 1700000001000}, False, id="timestamp"),
+            pytest.param({"data": {"switch_1": False}}, False, id="data"),
+            pytest.param({"device_id": "dev2"}, False, id="device"),
+            pytest.param({"event_type": "online"}, False, id="event-type"),
+        ],
+    )
+    def test_event_id_identity(self, changes: dict, same_id: bool) -> None:
+        base = event_to_record(_make_event()).event_id
+        assert (event_to_record(_make_event(**changes)).event_id == base) is same_id
 
     def test_event_id_is_positive_integer(self) -> None:
         record = event_to_record(_make_event())
         assert isinstance(record.event_id, int)
-        assert record.event_id > 0
+        assert 0 < record.event_id < 2**63
 
     def test_raw_json_roundtrips(self) -> None:
         event = _make_event()
@@ -69,6 +73,15 @@ class TestEventToRecord:
         assert parsed["devId"] == "dev1"
         assert parsed["bizCode"] == "dp_report"
 
+    def test_received_raw_json_is_stored_as_is(self) -> None:
+        event = _make_event()
+        event.raw_json = b'{"devId": "dev1", "extra": 1}'
+        assert event_to_record(event).raw_json == event.raw_json
+
+    def test_value_is_compact_canonical_json(self) -> None:
+        record = event_to_record(_make_event(data={"b": 1, "a": [1, 2]}))
+        assert record.value == '{"a":[1,2],"b":1}'
+
 
 class TestWatcherStorage:
     def test_converted_record_inserts(self) -> None:
@@ -112,3 +125,161 @@ class TestWatcherStorage:
         record = event_to_record(event)
         assert record.event_from == "ws"
         assert record.status == "ws"
+
+
+class TestEventWatcherBatching:
+    @pytest.mark.asyncio
+    async def test_events_stored_in_batches(self) -> None:
+        events = [
+            _make_event(device_id="dev1", timestamp=1700000000000),
+            _make_event(device_id="dev1", timestamp=1700000002000),
+            _make_event(device_id="dev1", timestamp=1700000002000),  # duplicate
+            _make_event(device_id="dev2", timestamp=1700000001000),
+        ]
+
+        async def subscribe(**kwargs):
+            for event in events:
+                yield event
+
+        client = MagicMock()
+        client.events.subscribe = subscribe
+        with LogStorage(Path(":memory:")) as storage:
+            commits: list[int] = []
+            real_transaction = storage.transaction
+
+            def counting_transaction():
+                commits.append(1)
+                return real_transaction()
+
+            storage.transaction = counting_transaction  # type: ignore[method-assign]
+            watcher = EventWatcher(client, storage, batch_size=3, flush_interval=60)
+            summaries = await watcher.run_with_callback()
+
+            assert [s["stored"] for s in summaries] == [True, True, False, True]
+            assert summaries[0] == {
+                "device_id": "dev1",
+                "event_type": "dp_report",
+                "data": events[0].data,
+                "timestamp": 1700000000000,
+                "stored": True,
+            }
+            assert watcher.count == 3
+            assert len(commits) == 2
+            assert storage.get_all_bookmarks() == [
+                ("dev1", 1700000002000), ("dev2", 1700000001000),
+            ]
+
+    @pytest.mark.asyncio
+    async def test_late_event_does_not_move_bookmark_back(self) -> None:
+        events = [
+            _make_event(timestamp=1700000005000),
+            _make_event(timestamp=1700000001000),  # arrives late, next batch
+        ]
+
+        async def subscribe(**kwargs):
+            for event in events:
+                yield event
+
+        client = MagicMock()
+        client.events.subscribe = subscribe
+        with LogStorage(Path(":memory:")) as storage:
+            watcher = EventWatcher(client, storage, batch_size=1, flush_interval=60)
+            assert await watcher.run() == 2
+            assert storage.get_all_bookmarks() == [("dev1", 1700000005000)]
+
+    @pytest.mark.asyncio
+    async def test_recent_repeat_skips_conversion(
+        self, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        from tuya_agent import watcher as watcher_module
+
+        events = [
+            _make_event(data={"switch_1": True}),
+            _make_event(data={"switch_1": True}),  # redelivered
+            _make_event(data={"switch_1": False}),  # same key, new data
+        ]
+
+        async def subscribe(**kwargs):
+            for event in events:
+                yield event
+
+        converted: list[TuyaEvent] = []
+
+        def spy(event: TuyaEvent):
+            converted.append(event)
+            return event_to_record(event)
+
+        monkeypatch.setattr(watcher_module, "event_to_record", spy)
+        client = MagicMock()
+        client.events.subscribe = subscribe
+        with LogStorage(Path(":memory:")) as storage:
+            watcher = EventWatcher(client, storage)
+            summaries = await watcher.run_with_callback()
+
+        assert [s["stored"] for s in summaries] == [True, False, True]
+        assert converted == [events[0], events[2]]
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self) -> None:
+        import asyncio
+
+        release = asyncio.Event()
+
+        async def subscribe(**kwargs):
+            yield _make_event()
+            await release.wait()
+
+        client = MagicMock()
+        client.events.subscribe = subscribe
+        with LogStorage(Path(":memory:")) as storage:
+            watcher = EventWatcher(client, storage, batch_size=64, flush_interval=0.01)
+            task = asyncio.create_task(watcher.run())
+            await asyncio.sleep(0.05)
+            assert storage.get_stats()["total_logs"] == 1
+            release.set()
+            assert await task == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_interval_flush_is_raised_and_retried(self) -> None:
+        import asyncio
+
+        async def subscribe(**kwargs):
+            yield _make_event()
+            await asyncio.Event().wait()  # idle until the duration ends
+
+        client = MagicMock()
+        client.events.subscribe = subscribe
+        with LogStorage(Path(":memory:")) as storage:
+            real_transaction = storage.transaction
+            failures = [sqlite3.OperationalError("database is locked")]
+
+            def flaky_transaction():
+                if failures:
+                    raise failures.pop()
+                return real_transaction()
+
+            storage.transaction = flaky_transaction  # type: ignore[method-assign]
+            watcher = EventWatcher(client, storage, batch_size=64, flush_interval=0.01)
+            with pytest.raises(sqlite3.OperationalError):
+                await watcher.run(duration=0.05)
+            # The failed batch was kept and written by the final flush.
+            assert not failures
+            assert storage.get_stats()["total_logs"] == 1
+            assert watcher.count == 1
+
+
+class TestLogEvent:
+    def test_logs_truncated_preview(self, caplog: pytest.LogCaptureFixture) -> None:
+        with caplog.at_level("INFO", logger="tuya_agent.watcher"):
+            _log_event(_make_event(data={"text": "x" * 200}), new=True)
+        assert "[NEW] dev1" in caplog.text
+        assert 'xxx... | 1700000000000' in caplog.text
+
+    def test_skips_preview_when_info_disabled(
+        self, caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        dumps = MagicMock(side_effect=AssertionError("preview built"))
+        monkeypatch.setattr("tuya_agent.watcher.json.dumps", dumps)
+        with caplog.at_level("WARNING", logger="tuya_agent.watcher"):
+            _log_event(_make_event(), new=True)
+        assert not caplog.records